@@ -5,7 +5,6 @@
 import time
 import serial
 import threading
-import statistics
 from config import SENSOR_CONFIG, UART_CONFIG, CALIBRATION_CONFIG, DATA_VALIDATION_CONFIG
 
 class PHSensor:
@@ -29,3 +29,11 @@ IMU_MAX_ACC = 10.0    # g
 
 # Output configuration
 PRINT_INTERVAL = 1.0  # seconds
+QUIET = False         # Suppress the periodic fusion report (e.g. in production)
+
+# MQTT publishing - samples are buffered and sent as one JSON array once
+# MQTT_BATCH_SIZE samples are queued or the oldest is MQTT_BATCH_MAX_DELAY
+# seconds old. A batch size of 1 keeps the single-object payload format.
+MQTT_BATCH_SIZE = 1
+MQTT_BATCH_MAX_DELAY = 5.0  # seconds
+DEBUG_GPS = False     # Print raw/converted coordinates for every GGA fix
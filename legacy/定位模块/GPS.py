@@ -2,11 +2,13 @@
 import time
 import serial
 import re
-import threading
 import CONFIG
+from positioning_reactor import PositioningReactor
+
+_INV60 = 1.0 / 60.0
 
 class GPSModule:
-    def __init__(self, port=CONFIG.GPS_PORT, baudrate=CONFIG.GPS_BAUDRATE):
+    def __init__(self, port=CONFIG.GPS_PORT, baudrate=CONFIG.GPS_BAUDRATE, reactor=None, new_data=None):
         self.port = port
         self.baudrate = baudrate
         self.ser = None
@@ -24,14 +26,19 @@ class GPSModule:
         self.valid = False
         self.timestamp = 0
         
-        # Thread control
+        # Reactor control
         self.running = False
-        self.thread = None
-        self._lock = threading.Lock()
+        self.reactor = reactor
+        self._fd = None
+        self.new_data = new_data  # Optional Condition notified after each parsed fix
+        self._buffer = b''
+        
+        # Latest fix, replaced as a whole by the reader so getters need no lock
+        self._latest = self._snapshot()
     
     def connect(self):
         try:
-            self.ser = serial.Serial(self.port, self.baudrate)
+            self.ser = serial.Serial(self.port, self.baudrate, timeout=0)  # Non-blocking: reads are driven by the reactor
             self.connected = self.ser.isOpen()
             if self.connected:
                 print(f"GPS connected on {self.port} at {self.baudrate} baud")
@@ -50,28 +57,19 @@ class GPSModule:
             print("GPS disconnected")
     
     def _convert_to_degrees(self, nmea_data, direction):
-        if not nmea_data:
+        # Need at least degree digits + 1 for minutes
+        if len(nmea_data) < 3:
             return 0.0
         
         try:
-            # NMEA format: DDMM.MMMM for latitude or DDDMM.MMMM for longitude
-            # For latitude, first 2 digits are degrees
-            # For longitude, first 3 digits are degrees
-            is_longitude = direction in ['E', 'W']
-            deg_digits = 3 if is_longitude else 2
-            
-            if len(nmea_data) < deg_digits + 1:  # Need at least degree digits + 1 for minutes
-                return 0.0
-                
-            deg = float(nmea_data[0:deg_digits])
-            min = float(nmea_data[deg_digits:])
-            result = deg + (min / 60.0)
+            # NMEA format: DDMM.MMMM for latitude or DDDMM.MMMM for longitude,
+            # so the integer hundreds are degrees and the remainder is minutes
+            value = float(nmea_data)
+            deg = int(value) // 100
+            result = deg + (value - deg * 100) * _INV60
             
             # Apply direction
-            if direction in ['S', 'W']:
-                result = -result
-                
-            return result
+            return -result if direction in ('S', 'W') else result
         except Exception as e:
             print(f"Error converting NMEA to degrees: {e}, data: {nmea_data}, direction: {direction}")
             return 0.0
@@ -98,8 +96,9 @@ class GPSModule:
                         self.alt = float(gga_parts[9]) if gga_parts[9] else 0.0
                         
                         # Debug output to verify conversion
-                        print(f"Raw GPS data - Lat: {gga_parts[2]}{gga_parts[3]}, Lon: {gga_parts[4]}{gga_parts[5]}")
-                        print(f"Converted - Lat: {self.lat:.6f}, Lon: {self.lon:.6f}")
+                        if CONFIG.DEBUG_GPS:
+                            print(f"Raw GPS data - Lat: {gga_parts[2]}{gga_parts[3]}, Lon: {gga_parts[4]}{gga_parts[5]}")
+                            print(f"Converted - Lat: {self.lat:.6f}, Lon: {self.lon:.6f}")
                         
                         # Validate data
                         if self.satellites >= CONFIG.GPS_MIN_SATELLITES:
@@ -128,56 +127,79 @@ class GPSModule:
             self.valid = False
             return False
     
-    def _read_loop(self):
-        buffer = b''
+    def _on_readable(self):
+        """Reactor callback - serial port has data pending"""
+        if not (self.running and self.connected):
+            return
         
-        while self.running and self.connected:
-            try:
-                if self.ser.in_waiting:
-                    data = self.ser.read(self.ser.in_waiting)
-                    buffer += data
-                    
-                    # Process complete NMEA sentences
-                    if b'\r\n' in buffer:
-                        with self._lock:
-                            self._parse_gps_data(buffer)
-                        buffer = b''  # Clear buffer after processing
+        try:
+            data = self.ser.read(self.ser.in_waiting or 1)
+            self._buffer += data
+            
+            # Process complete NMEA sentences
+            if b'\r\n' in self._buffer:
+                self._parse_gps_data(self._buffer)
+                self._buffer = b''  # Clear buffer after processing
+                
+                # Publish the new fix (atomic reference swap)
+                self._latest = self._snapshot()
                 
-                time.sleep(0.01)  # Small delay to prevent CPU hogging
+                if self.new_data is not None:
+                    with self.new_data:
+                        self.new_data.notify_all()
                 
-            except Exception as e:
-                print(f"GPS read error: {e}")
-                time.sleep(1)  # Wait before retrying
+        except Exception as e:
+            print(f"GPS read error: {e}")
+            self._buffer = b''
+            return False
+    
+    def _on_hangup(self):
+        """Reactor callback - the port hung up or a read failed, it is no longer polled"""
+        print("GPS serial port lost, reconnect required")
+        self.connected = False
+        try:
+            self.ser.close()
+        except Exception:
+            pass
     
     def start(self):
         if not self.connected:
             if not self.connect():
                 return False
         
+        if self.reactor is None:
+            self.reactor = PositioningReactor()
+        
         self.running = True
-        self.thread = threading.Thread(target=self._read_loop)
-        self.thread.daemon = True
-        self.thread.start()
+        self._buffer = b''
+        self._fd = self.ser.fileno()
+        self.reactor.add(self._fd, self._on_readable, self._on_hangup)
+        self.reactor.start()
         return True
     
     def stop(self):
         self.running = False
-        if self.thread:
-            self.thread.join(timeout=1.0)
+        if self.reactor and self._fd is not None:
+            if self.reactor.remove(self._fd):
+                self.reactor.stop()
+            self._fd = None
         self.disconnect()
     
+    def _snapshot(self):
+        return {
+            'timestamp': self.timestamp,
+            'latitude': self.lat,
+            'longitude': self.lon,
+            'altitude': self.alt,
+            'speed': self.speed_kph / 3.6,  # Convert to m/s
+            'course': self.course,
+            'satellites': self.satellites,
+            'valid': self.valid
+        }
+    
     def get_position(self):
-        with self._lock:
-            return {
-                'timestamp': self.timestamp,
-                'latitude': self.lat,
-                'longitude': self.lon,
-                'altitude': self.alt,
-                'speed': self.speed_kph / 3.6,  # Convert to m/s
-                'course': self.course,
-                'satellites': self.satellites,
-                'valid': self.valid
-            }
+        """Latest GPS fix - shared snapshot, callers must not modify it"""
+        return self._latest
 
 # For standalone testing
 if __name__ == "__main__":
@@ -1,12 +1,22 @@
 # coding: utf-8
 import serial
-import threading
 import time
 import math
+import struct
 import CONFIG
+from positioning_reactor import PositioningReactor
+
+# Full-scale ranges of the signed 16-bit IMU samples
+_ACC_SCALE = 16.0 / 32768.0      # g
+_GYRO_SCALE = 2000.0 / 32768.0   # deg/s
+_ANGLE_SCALE = 180.0 / 32768.0   # deg
+
+# 11-byte frame: 0x55, type, x, y, z, temperature (int16 LE), checksum
+_IMU_FRAME = struct.Struct('<BB4hB')
+_IMU_FRAME_SIZE = _IMU_FRAME.size
 
 class IMUModule:
-    def __init__(self, port=CONFIG.IMU_PORT, baudrate=CONFIG.IMU_BAUDRATE):
+    def __init__(self, port=CONFIG.IMU_PORT, baudrate=CONFIG.IMU_BAUDRATE, reactor=None, new_data=None):
         self.port = port
         self.baudrate = baudrate
         self.ser = None
@@ -25,22 +35,22 @@ class IMUModule:
         self.angle_offset = [0.0, 0.0, 0.0]
         self.is_calibrated = False
         
-        # Frame parsing state
-        self.FrameState = 0
-        self.Bytenum = 0
-        self.CheckSum = 0
-        self.ACCData = [0.0] * 8
-        self.GYROData = [0.0] * 8
-        self.AngleData = [0.0] * 8
+        # Frame parsing state - unconsumed bytes from the serial port
+        self._buf = bytearray()
         
-        # Thread control
+        # Reactor control
         self.running = False
-        self.thread = None
-        self._lock = threading.Lock()
+        self.reactor = reactor
+        self._fd = None
+        self.new_data = new_data  # Optional Condition notified after each angle frame
+        
+        # Latest sample, replaced as a whole by the reader so getters need no lock.
+        # The dict and its lists are never mutated after publishing.
+        self._latest = self._snapshot()
     
     def connect(self):
         try:
-            self.ser = serial.Serial(self.port, self.baudrate, timeout=0.5)
+            self.ser = serial.Serial(self.port, self.baudrate, timeout=0)  # Non-blocking: reads are driven by the reactor
             self.connected = self.ser.isOpen()
             if self.connected:
                 print(f"IMU connected on {self.port} at {self.baudrate} baud")
@@ -58,180 +68,120 @@ class IMUModule:
             self.connected = False
             print("IMU disconnected")
     
-    def _get_acc(self, datahex):
-        axl = datahex[0]
-        axh = datahex[1]
-        ayl = datahex[2]
-        ayh = datahex[3]
-        azl = datahex[4]
-        azh = datahex[5]
-        
-        k_acc = 16.0
-        acc_x = (axh << 8 | axl) / 32768.0 * k_acc
-        acc_y = (ayh << 8 | ayl) / 32768.0 * k_acc
-        acc_z = (azh << 8 | azl) / 32768.0 * k_acc
-        
-        if acc_x >= k_acc:
-            acc_x -= 2 * k_acc
-        if acc_y >= k_acc:
-            acc_y -= 2 * k_acc
-        if acc_z >= k_acc:
-            acc_z -= 2 * k_acc
-            
-        return [acc_x, acc_y, acc_z]  # Return list instead of tuple
+    def _get_acc(self, x, y, z):
+        return [x * _ACC_SCALE, y * _ACC_SCALE, z * _ACC_SCALE]  # Return list instead of tuple
 
-    def _get_gyro(self, datahex):
-        wxl = datahex[0]
-        wxh = datahex[1]
-        wyl = datahex[2]
-        wyh = datahex[3]
-        wzl = datahex[4]
-        wzh = datahex[5]
-        
-        k_gyro = 2000.0
-        gyro_x = (wxh << 8 | wxl) / 32768.0 * k_gyro
-        gyro_y = (wyh << 8 | wyl) / 32768.0 * k_gyro
-        gyro_z = (wzh << 8 | wzl) / 32768.0 * k_gyro
-        
-        if gyro_x >= k_gyro:
-            gyro_x -= 2 * k_gyro
-        if gyro_y >= k_gyro:
-            gyro_y -= 2 * k_gyro
-        if gyro_z >= k_gyro:
-            gyro_z -= 2 * k_gyro
-            
-        return [gyro_x, gyro_y, gyro_z]  # Return list instead of tuple
+    def _get_gyro(self, x, y, z):
+        return [x * _GYRO_SCALE, y * _GYRO_SCALE, z * _GYRO_SCALE]  # Return list instead of tuple
 
-    def _get_angle(self, datahex):
-        rxl = datahex[0]
-        rxh = datahex[1]
-        ryl = datahex[2]
-        ryh = datahex[3]
-        rzl = datahex[4]
-        rzh = datahex[5]
-        
-        k_angle = 180.0
-        angle_x = (rxh << 8 | rxl) / 32768.0 * k_angle
-        angle_y = (ryh << 8 | ryl) / 32768.0 * k_angle
-        angle_z = (rzh << 8 | rzl) / 32768.0 * k_angle
-        
-        if angle_x >= k_angle:
-            angle_x -= 2 * k_angle
-        if angle_y >= k_angle:
-            angle_y -= 2 * k_angle
-        if angle_z >= k_angle:
-            angle_z -= 2 * k_angle
-            
-        return [angle_x, angle_y, angle_z]  # Return list instead of tuple
+    def _get_angle(self, x, y, z):
+        return [x * _ANGLE_SCALE, y * _ANGLE_SCALE, z * _ANGLE_SCALE]  # Return list instead of tuple
     
     def _due_data(self, inputdata):
-        for data in inputdata:
-            if self.FrameState == 0:  # When the state is not determined
-                if data == 0x55 and self.Bytenum == 0:  # Frame header 1
-                    self.CheckSum = data
-                    self.Bytenum = 1
-                    continue
-                elif data == 0x51 and self.Bytenum == 1:  # Acceleration frame
-                    self.CheckSum += data
-                    self.FrameState = 1
-                    self.Bytenum = 2
-                elif data == 0x52 and self.Bytenum == 1:  # Angular velocity frame
-                    self.CheckSum += data
-                    self.FrameState = 2
-                    self.Bytenum = 2
-                elif data == 0x53 and self.Bytenum == 1:  # Angle frame
-                    self.CheckSum += data
-                    self.FrameState = 3
-                    self.Bytenum = 2
+        """Decode complete frames, returns True if a new angle sample arrived"""
+        new_sample = False
+        buf = self._buf
+        buf += inputdata
+        end = len(buf) - _IMU_FRAME_SIZE
+        i = 0
+        
+        while i <= end:
+            if buf[i] != 0x55:  # Resync on frame header
+                i = buf.find(0x55, i + 1)
+                if i < 0:
+                    i = len(buf)
+                    break
+                continue
             
-            elif self.FrameState == 1:  # Acceleration frame
-                if self.Bytenum < 10:  # Read 8 data
-                    self.ACCData[self.Bytenum-2] = data
-                    self.CheckSum += data
-                    self.Bytenum += 1
-                else:
-                    if data == (self.CheckSum & 0xff):  # Verify checksum
-                        with self._lock:
-                            self.acc = self._get_acc(self.ACCData)
-                    self.CheckSum = 0
-                    self.Bytenum = 0
-                    self.FrameState = 0
+            hdr, frame_type, x, y, z, _temp, checksum = _IMU_FRAME.unpack_from(buf, i)
+            if checksum != (sum(buf[i:i + _IMU_FRAME_SIZE - 1]) & 0xff):  # Verify checksum
+                i += 1
+                continue
+            i += _IMU_FRAME_SIZE
             
-            elif self.FrameState == 2:  # Angular velocity frame
-                if self.Bytenum < 10:
-                    self.GYROData[self.Bytenum-2] = data
-                    self.CheckSum += data
-                    self.Bytenum += 1
-                else:
-                    if data == (self.CheckSum & 0xff):
-                        with self._lock:
-                            self.gyro = self._get_gyro(self.GYROData)
-                    self.CheckSum = 0
-                    self.Bytenum = 0
-                    self.FrameState = 0
+            if frame_type == 0x51:  # Acceleration frame
+                self.acc = self._get_acc(x, y, z)
             
-            elif self.FrameState == 3:  # Angle frame
-                if self.Bytenum < 10:
-                    self.AngleData[self.Bytenum-2] = data
-                    self.CheckSum += data
-                    self.Bytenum += 1
-                else:
-                    if data == (self.CheckSum & 0xff):
-                        with self._lock:
-                            self.angle = self._get_angle(self.AngleData)
-                            self.timestamp = time.time()
-                            
-                            # Validate IMU data
-                            max_gyro = max(abs(g) for g in self.gyro)
-                            max_acc = max(abs(a) for a in self.acc)
-                            
-                            if (max_gyro <= CONFIG.IMU_MAX_GYRO and 
-                                max_acc <= CONFIG.IMU_MAX_ACC):
-                                self.valid = True
-                            else:
-                                self.valid = False
-                    
-                    self.CheckSum = 0
-                    self.Bytenum = 0
-                    self.FrameState = 0
+            elif frame_type == 0x52:  # Angular velocity frame
+                self.gyro = self._get_gyro(x, y, z)
+            
+            elif frame_type == 0x53:  # Angle frame
+                self.angle = self._get_angle(x, y, z)
+                self.timestamp = time.time()
+                
+                # Validate IMU data
+                G = CONFIG.IMU_MAX_GYRO
+                A = CONFIG.IMU_MAX_ACC
+                gx, gy, gz = self.gyro
+                ax, ay, az = self.acc
+                self.valid = (-G <= gx <= G and -G <= gy <= G and -G <= gz <= G and
+                              -A <= ax <= A and -A <= ay <= A and -A <= az <= A)
+                
+                # Publish the completed sample (atomic reference swap)
+                self._latest = self._snapshot()
+                new_sample = True
+        
+        # Keep any partial frame for the next read
+        del buf[:i]
+        return new_sample
     
-    def _read_loop(self):
-        while self.running and self.connected:
-            try:
-                if self.ser.in_waiting:
-                    data = self.ser.read(self.ser.in_waiting)
-                    self._due_data(data)
-                time.sleep(0.001)  # Small delay to prevent CPU hogging
-            except Exception as e:
-                print(f"IMU read error: {e}")
-                time.sleep(1)  # Wait before retrying
+    def _on_readable(self):
+        """Reactor callback - serial port has data pending"""
+        if not (self.running and self.connected):
+            return
+        
+        try:
+            data = self.ser.read(self.ser.in_waiting or 1)
+            if self._due_data(data) and self.new_data is not None:
+                with self.new_data:
+                    self.new_data.notify_all()
+        except Exception as e:
+            print(f"IMU read error: {e}")
+            return False
+    
+    def _on_hangup(self):
+        """Reactor callback - the port hung up or a read failed, it is no longer polled"""
+        print("IMU serial port lost, reconnect required")
+        self.connected = False
+        try:
+            self.ser.close()
+        except Exception:
+            pass
     
     def start(self):
         if not self.connected:
             if not self.connect():
                 return False
         
+        if self.reactor is None:
+            self.reactor = PositioningReactor()
+        
         self.running = True
-        self.thread = threading.Thread(target=self._read_loop)
-        self.thread.daemon = True
-        self.thread.start()
+        self._fd = self.ser.fileno()
+        self.reactor.add(self._fd, self._on_readable, self._on_hangup)
+        self.reactor.start()
         return True
     
     def stop(self):
         self.running = False
-        if self.thread:
-            self.thread.join(timeout=1.0)
+        if self.reactor and self._fd is not None:
+            if self.reactor.remove(self._fd):
+                self.reactor.stop()
+            self._fd = None
         self.disconnect()
     
+    def _snapshot(self):
+        return {
+            'timestamp': self.timestamp,
+            'acc': self.acc,
+            'gyro': self.gyro,
+            'angle': self.angle,
+            'valid': self.valid
+        }
+    
     def get_imu_data(self):
-        with self._lock:
-            return {
-                'timestamp': self.timestamp,
-                'acc': self.acc.copy(),
-                'gyro': self.gyro.copy(),
-                'angle': self.angle.copy(),
-                'valid': self.valid
-            }
+        """Latest IMU sample - shared snapshot, callers must not modify it"""
+        return self._latest
     
     def calibrate_zero_point(self, samples=100, delay=0.01):
         """
@@ -261,11 +211,11 @@ class IMUModule:
         angle_samples = []
         
         for i in range(samples):
-            with self._lock:
-                if self.valid:
-                    gyro_samples.append(self.gyro.copy())
-                    acc_samples.append(self.acc.copy())
-                    angle_samples.append(self.angle.copy())
+            data = self._latest
+            if data['valid']:
+                gyro_samples.append(data['gyro'])
+                acc_samples.append(data['acc'])
+                angle_samples.append(data['angle'])
             
             # Progress indicator
             if (i+1) % 20 == 0:
@@ -309,29 +259,29 @@ class IMUModule:
 
     def get_calibrated_imu_data(self):
         """Get IMU data with calibration applied"""
-        with self._lock:
-            if not hasattr(self, 'is_calibrated') or not self.is_calibrated:
-                return self.get_imu_data()  # Return uncalibrated data
-            
-            # Apply calibration to gyro and accelerometer
-            calibrated_gyro = self.apply_calibration(self.gyro, self.gyro_offset)
-            calibrated_acc = self.apply_calibration(self.acc, self.acc_offset)
-            
-            # For angle, we calculate relative to initial orientation
-            calibrated_angle = self.apply_calibration(self.angle, self.angle_offset)
-            
-            # Normalize yaw angle to 0-360 range
-            if calibrated_angle[2] < 0:
-                calibrated_angle[2] += 360
-            
-            return {
-                'timestamp': self.timestamp,
-                'acc': calibrated_acc,
-                'gyro': calibrated_gyro,
-                'angle': calibrated_angle,
-                'raw_angle': self.angle.copy(),  # Keep raw angle for reference
-                'valid': self.valid
-            }
+        data = self._latest
+        if not self.is_calibrated:
+            return data  # Return uncalibrated data
+        
+        # Apply calibration to gyro and accelerometer
+        calibrated_gyro = self.apply_calibration(data['gyro'], self.gyro_offset)
+        calibrated_acc = self.apply_calibration(data['acc'], self.acc_offset)
+        
+        # For angle, we calculate relative to initial orientation
+        calibrated_angle = self.apply_calibration(data['angle'], self.angle_offset)
+        
+        # Normalize yaw angle to 0-360 range
+        if calibrated_angle[2] < 0:
+            calibrated_angle[2] += 360
+        
+        return {
+            'timestamp': data['timestamp'],
+            'acc': calibrated_acc,
+            'gyro': calibrated_gyro,
+            'angle': calibrated_angle,
+            'raw_angle': data['angle'],  # Keep raw angle for reference
+            'valid': data['valid']
+        }
     
     def reset_calibration(self):
         """Reset calibration data"""
@@ -1,10 +1,15 @@
 # coding: utf-8
+import os
+import sys
 import time
 import threading
+import queue
 import json
+from collections import namedtuple
 from GPS import GPSModule
 from IMU import IMUModule
 from fusion import KalmanFilter
+from positioning_reactor import PositioningReactor
 import CONFIG
 
 # 导入MQTT客户端
@@ -15,32 +20,63 @@ except ImportError:
     print("警告: paho-mqtt库未安装，MQTT功能将不可用")
     MQTT_AVAILABLE = False
 
+# 优先使用orjson进行JSON序列化，未安装时回退到标准库json
+try:
+    import orjson
+
+    def _json_dumps(obj, indent=False):
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj, indent=False):
+        return json.dumps(obj, indent=4 if indent else None).encode()
+
+    _json_loads = json.loads
+
+# Immutable fusion result published by the fusion thread
+FusionResult = namedtuple('FusionResult', [
+    'timestamp', 'latitude', 'longitude', 'altitude', 'speed', 'course',
+    'roll', 'pitch', 'yaw', 'pos_accuracy', 'heading_accuracy', 'valid',
+    'satellites'
+])
+
+# Terminal report for _print_results, formatted and written in one go
+_RESULTS_TEMPLATE = (
+    "\n===== GPS-IMU Fusion Results =====\n"
+    "Time: {time}\n"
+    "Position: {r.latitude:.8f}°, {r.longitude:.8f}°\n"
+    "Altitude: {r.altitude:.2f}m\n"
+    "Speed: {speed_kmh:.2f} km/h\n"
+    "Course: {r.course:.2f}°\n"
+    "Attitude: Roll={r.roll:.2f}°, Pitch={r.pitch:.2f}°, Yaw={r.yaw:.2f}°\n"
+    "Accuracy: Position={r.pos_accuracy:.2f}m, Heading={r.heading_accuracy:.2f}°\n"
+    "==================================\n\n"
+)
+
 class FusionSystem:
     def __init__(self):
-        self.gps = GPSModule()
-        self.imu = IMUModule()
+        # GPS and IMU share one reactor thread for their serial reads and
+        # wake the fusion loop through _new_data when a sample arrives
+        self.reactor = PositioningReactor()
+        self._new_data = threading.Condition()
+        self.gps = GPSModule(reactor=self.reactor, new_data=self._new_data)
+        self.imu = IMUModule(reactor=self.reactor, new_data=self._new_data)
         self.kf = KalmanFilter()
         
         self.running = False
         self.fusion_thread = None
-        self.last_print_time = 0
+        self._print_interval_ns = int(CONFIG.PRINT_INTERVAL * 1e9)
+        self._last_print_ns = 0
         
-        # API result
-        self._lock = threading.Lock()
-        self._latest_result = {
-            'timestamp': 0,
-            'latitude': 0.0,
-            'longitude': 0.0,
-            'altitude': 0.0,
-            'speed': 0.0,
-            'course': 0.0,
-            'roll': 0.0,
-            'pitch': 0.0,
-            'yaw': 0.0,
-            'pos_accuracy': 0.0,
-            'heading_accuracy': 0.0,
-            'valid': False
-        }
+        # API result - an immutable snapshot replaced as a whole by the
+        # fusion thread, so readers load it once without locking
+        self._latest_snapshot = FusionResult(
+            0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, False, 0
+        )
 
         # MQTT客户端配置
         self.mqtt_client = None
@@ -48,6 +84,10 @@ class FusionSystem:
         self.mqtt_broker = 'localhost'  # MQTT broker地址
         self.mqtt_port = 1883  # MQTT broker端口
         self.mqtt_topic = 'navigation/position'  # 定位数据主题
+        self._mqtt_buf = []  # 待发送的定位数据
+        self._mqtt_batch_size = max(1, CONFIG.MQTT_BATCH_SIZE)
+        self._mqtt_q = queue.Queue(maxsize=64)  # 融合线程 -> MQTT发送线程
+        self._mqtt_thread = None
         self._init_mqtt_client()
 
     def _init_mqtt_client(self):
@@ -92,6 +132,12 @@ class FusionSystem:
         self.fusion_thread.daemon = True
         self.fusion_thread.start()
         
+        # 启动MQTT发送线程，网络阻塞不会影响融合线程
+        if self.mqtt_enabled and self.mqtt_client:
+            self._mqtt_thread = threading.Thread(target=self._mqtt_worker)
+            self._mqtt_thread.daemon = True
+            self._mqtt_thread.start()
+        
         print("GPS-IMU fusion system started successfully")
         return True
     
@@ -99,6 +145,8 @@ class FusionSystem:
         """Stop all modules and fusion thread"""
         print("Stopping GPS-IMU fusion system...")
         self.running = False
+        with self._new_data:
+            self._new_data.notify_all()
         
         if self.fusion_thread:
             self.fusion_thread.join(timeout=1.0)
@@ -106,7 +154,11 @@ class FusionSystem:
         self.gps.stop()
         self.imu.stop()
 
-        # 清理MQTT客户端
+        # 通知MQTT发送线程发送剩余数据后退出，然后清理MQTT客户端
+        if self._mqtt_thread:
+            self._enqueue_mqtt(None)
+            self._mqtt_thread.join(timeout=2.0)
+            self._mqtt_thread = None
         self._cleanup_mqtt_client()
 
         print("GPS-IMU fusion system stopped")
@@ -125,6 +177,9 @@ class FusionSystem:
         """Main fusion loop - runs in its own thread"""
         while self.running:
             try:
+                # Monotonic clock drives the filter and print interval (immune to
+                # NTP steps); wall-clock time is only used to stamp the result
+                now_ns = time.monotonic_ns()
                 current_time = time.time()
                 
                 # Get GPS data
@@ -133,58 +188,40 @@ class FusionSystem:
                 # Get calibrated IMU data
                 imu_data = self.imu.get_calibrated_imu_data()
                 
-                # Predict next state using time update
-                self.kf.predict(current_time)
-                
-                # Update with GPS data if valid
+                # GPS fix and IMU attitude, None when not valid
+                gps_fix = None
                 if gps_data['valid']:
-                    self.kf.update_gps(
+                    gps_fix = (
                         gps_data['latitude'],
                         gps_data['longitude'],
                         gps_data['altitude'],
                         gps_data['speed'],
-                        gps_data['course'],
-                        gps_data['valid']
+                        gps_data['course']
                     )
+                attitude = imu_data['angle'] if imu_data['valid'] else None
                 
-                # Update with IMU data if valid
-                if imu_data['valid']:
-                    # Access list elements directly
-                    self.kf.update_imu(
-                        imu_data['angle'][0],  # roll
-                        imu_data['angle'][1],  # pitch
-                        imu_data['angle'][2],  # yaw
-                        imu_data['valid']
-                    )
+                # Predict and update in a single fused filter step
+                self.kf.step(now_ns * 1e-9, gps_fix, attitude)
                 
                 # Get current state estimate
                 state = self.kf.get_state()
                 
-                # Update latest result for API access
-                with self._lock:
-                    self._latest_result = {
-                        'timestamp': current_time,
-                        'latitude': state['latitude'],
-                        'longitude': state['longitude'],
-                        'altitude': state['altitude'],
-                        'speed': state['speed'],
-                        'course': state['course'],
-                        'roll': state['roll'],
-                        'pitch': state['pitch'],
-                        'yaw': state['yaw'],
-                        'pos_accuracy': state['pos_accuracy'],
-                        'heading_accuracy': state['heading_accuracy'],
-                        'valid': state['valid']
-                    }
+                # Publish latest result for API access (atomic reference swap)
+                self._latest_snapshot = FusionResult(
+                    timestamp=current_time,
+                    satellites=gps_data['satellites'] if gps_data['valid'] else 0,
+                    **state
+                )
                 
                 # Print results and send MQTT data at specified interval
-                if current_time - self.last_print_time >= CONFIG.PRINT_INTERVAL:
+                if now_ns - self._last_print_ns >= self._print_interval_ns:
                     self._print_results()
                     self._send_mqtt_data()  # 发送MQTT定位数据
-                    self.last_print_time = current_time
+                    self._last_print_ns = now_ns
                 
-                # Small delay to prevent CPU hogging
-                time.sleep(0.01)
+                # Sleep until GPS/IMU deliver a new sample
+                with self._new_data:
+                    self._new_data.wait(timeout=0.1)
                 
             except Exception as e:
                 print(f"Error in fusion loop: {e}")
@@ -192,22 +229,21 @@ class FusionSystem:
     
     def _print_results(self):
         """Print current fusion results to terminal"""
-        with self._lock:
-            result = self._latest_result.copy()
+        if CONFIG.QUIET:
+            return
+        
+        snap = self._latest_snapshot
         
-        if not result['valid']:
+        if not snap.valid:
             print("Waiting for valid data...")
             return
         
-        print("\n===== GPS-IMU Fusion Results =====")
-        print(f"Time: {time.strftime('%H:%M:%S')}")
-        print(f"Position: {result['latitude']:.8f}°, {result['longitude']:.8f}°")
-        print(f"Altitude: {result['altitude']:.2f}m")
-        print(f"Speed: {result['speed'] * 3.6:.2f} km/h")
-        print(f"Course: {result['course']:.2f}°")
-        print(f"Attitude: Roll={result['roll']:.2f}°, Pitch={result['pitch']:.2f}°, Yaw={result['yaw']:.2f}°")
-        print(f"Accuracy: Position={result['pos_accuracy']:.2f}m, Heading={result['heading_accuracy']:.2f}°")
-        print("==================================\n")
+        sys.stdout.write(_RESULTS_TEMPLATE.format(
+            r=snap,
+            time=time.strftime('%H:%M:%S'),
+            speed_kmh=snap.speed * 3.6
+        ))
+        sys.stdout.flush()
 
     def _send_mqtt_data(self):
         """发送定位数据到MQTT主题"""
@@ -216,25 +252,66 @@ class FusionSystem:
 
         try:
             # 获取当前定位数据
-            with self._lock:
-                position_data = self._latest_result.copy()
+            snap = self._latest_snapshot
 
             # 只有在数据有效时才发送
-            if not position_data['valid']:
+            if not snap.valid:
                 return
+            # 快照中已包含融合时的卫星数量
+            position_data = snap._asdict()
 
-            # 添加卫星数量信息（如果GPS数据可用）
-            gps_data = self.gps.get_position()
-            if gps_data['valid']:
-                position_data['satellites'] = gps_data.get('satellites', 0)
-            else:
-                position_data['satellites'] = 0
+            # 交给MQTT发送线程
+            self._enqueue_mqtt(position_data)
 
-            # 发送到MQTT主题
-            result = self.mqtt_client.publish(self.mqtt_topic, json.dumps(position_data))
+        except Exception as e:
+            print(f"定位数据MQTT发送错误: {e}")
+
+    def _enqueue_mqtt(self, item):
+        """放入MQTT发送队列，队列满时丢弃最旧的数据"""
+        while True:
+            try:
+                self._mqtt_q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._mqtt_q.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _mqtt_worker(self):
+        """MQTT发送线程：从队列取出定位数据，达到批量大小或最长等待时间后发送"""
+        while True:
+            try:
+                item = self._mqtt_q.get(timeout=CONFIG.MQTT_BATCH_MAX_DELAY)
+            except queue.Empty:
+                self._flush_mqtt_buffer()
+                continue
+
+            if item is None:  # 停止信号
+                break
+
+            self._mqtt_buf.append(item)
+            if (len(self._mqtt_buf) >= self._mqtt_batch_size or
+                    item['timestamp'] - self._mqtt_buf[0]['timestamp'] >= CONFIG.MQTT_BATCH_MAX_DELAY):
+                self._flush_mqtt_buffer()
+
+        self._flush_mqtt_buffer()
+
+    def _flush_mqtt_buffer(self):
+        """将缓存的定位数据一次性发送到MQTT主题"""
+        buf = self._mqtt_buf
+        if not buf:
+            return
+        self._mqtt_buf = []
+
+        try:
+            # 单条数据保持原有的对象格式，多条数据以JSON数组发送
+            payload = _json_dumps(buf[0] if len(buf) == 1 else buf)
+            # 遥测数据使用QoS 0且不保留，无需等待PUBACK；payload已是bytes，无需再编码
+            result = self.mqtt_client.publish(self.mqtt_topic, payload, qos=0, retain=False)
 
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                print(f"定位数据已发送到MQTT主题: {self.mqtt_topic}")
+                print(f"定位数据已发送到MQTT主题: {self.mqtt_topic} ({len(buf)}条)")
             else:
                 print(f"定位数据MQTT发送失败，错误码: {result.rc}")
 
@@ -243,8 +320,7 @@ class FusionSystem:
 
     def get_position(self):
         """API method to get the latest fusion results"""
-        with self._lock:
-            return self._latest_result.copy()
+        return self._latest_snapshot._asdict()
     
     def recalibrate_imu(self):
         """Recalibrate IMU zero point on demand"""
@@ -259,7 +335,6 @@ class FusionSystem:
     def save_calibration(self, filename="imu_calibration.json"):
         """Save IMU calibration data to file"""
         if hasattr(self.imu, 'is_calibrated') and self.imu.is_calibrated:
-            import json
             try:
                 calibration_data = {
                     'gyro_offset': self.imu.gyro_offset,
@@ -269,8 +344,8 @@ class FusionSystem:
                     'date': time.strftime('%Y-%m-%d %H:%M:%S')
                 }
                 
-                with open(filename, 'w') as f:
-                    json.dump(calibration_data, f, indent=4)
+                with open(filename, 'wb') as f:
+                    f.write(_json_dumps(calibration_data, indent=True))
                 print(f"Calibration data saved to {filename}")
                 return True
             except Exception as e:
@@ -282,16 +357,13 @@ class FusionSystem:
     
     def load_calibration(self, filename="imu_calibration.json"):
         """Load IMU calibration data from file"""
-        import json
-        import os
-        
         if not os.path.exists(filename):
             print(f"Calibration file {filename} not found")
             return False
         
         try:
-            with open(filename, 'r') as f:
-                calibration_data = json.load(f)
+            with open(filename, 'rb') as f:
+                calibration_data = _json_loads(f.read())
             
             self.imu.gyro_offset = calibration_data['gyro_offset']
             self.imu.acc_offset = calibration_data['acc_offset']
@@ -4,31 +4,159 @@ import time
 import math
 import CONFIG
 
+# Filter arrays are single precision: local ENU offsets in metres and
+# attitudes in degrees need far less than float64 resolution
+_DTYPE = np.float32
+
+
+def _kf_predict(state, P, Q_diag, dt):
+    """Time update: constant-velocity model on the position states
+    
+    F is identity plus dt at (0,3), (1,4), (2,5), so F @ x and F @ P @ F.T
+    reduce to adding dt-scaled velocity rows/columns onto the position ones.
+    """
+    for i in range(3):
+        state[i] += dt * state[i + 3]  # x += vx * dt
+    
+    P[0:3, :] += dt * P[3:6, :]  # F @ P
+    P[:, 0:3] += dt * P[:, 3:6]  # (F @ P) @ F.T
+    
+    # Q is diagonal, add Q * dt onto the diagonal without a 9x9 temporary
+    for i in range(9):
+        P[i, i] += Q_diag[i] * dt
+    return state, P
+
+
+def _kf_update_gps(state, P, R, z):
+    """Measurement update with GPS position and velocity
+    
+    H selects states 0-5, so H @ x, H @ P and H @ P @ H.T are plain slices.
+    """
+    HP = np.ascontiguousarray(P[0:6, :])
+    
+    # Innovation (measurement residual) and its covariance
+    y = z - state[0:6]
+    S = HP[:, 0:6] + R
+    
+    # Kalman gain - S and P are symmetric, so K = (S^-1 H P)^T
+    K = np.linalg.solve(S, HP).T
+    
+    state += K @ y
+    P -= K @ HP  # (I - K @ H) @ P
+    return state, P
+
+
+def _kf_update_imu(state, P, R, z):
+    """Measurement update with IMU attitude (H selects states 6-8)"""
+    HP = np.ascontiguousarray(P[6:9, :])
+    
+    # Innovation (measurement residual)
+    y = z - state[6:9]
+    
+    # Special handling for yaw angle wrap-around
+    if y[2] > 180:
+        y[2] -= 360
+    elif y[2] < -180:
+        y[2] += 360
+    
+    # Innovation covariance and Kalman gain
+    S = HP[:, 6:9] + R
+    K = np.linalg.solve(S, HP).T
+    
+    state += K @ y
+    P -= K @ HP  # (I - K @ H) @ P
+    return state, P
+
+
+def _kf_step(state, P, Q_diag, R_gps, R_imu, gps_z, gps_valid, imu_z, imu_valid, dt,
+             pos_unc, head_unc):
+    """One fused fusion tick: predict, then GPS and/or IMU update
+    
+    Returns (state, P, pos_uncertainty, heading_uncertainty), with the
+    uncertainties refreshed after the same steps as the separate methods.
+    """
+    if dt > 0:
+        state, P = _kf_predict(state, P, Q_diag, dt)
+        pos_unc = math.sqrt(0.5 * (P[0, 0] + P[1, 1]))
+        head_unc = math.sqrt(P[8, 8])
+    
+    if gps_valid:
+        state, P = _kf_update_gps(state, P, R_gps, gps_z)
+        pos_unc = math.sqrt(0.5 * (P[0, 0] + P[1, 1]))
+    
+    if imu_valid:
+        state, P = _kf_update_imu(state, P, R_imu, imu_z)
+        head_unc = math.sqrt(P[8, 8])
+    
+    return state, P, pos_unc, head_unc
+
+
+# Numba is optional and slow to import, so the kernels above are compiled on
+# first use rather than at import time; without it they run as NumPy code
+NUMBA_AVAILABLE = None  # Unknown until _ensure_jit() has run
+
+
+def _ensure_jit():
+    global NUMBA_AVAILABLE, _kf_predict, _kf_update_gps, _kf_update_imu, _kf_step
+    if NUMBA_AVAILABLE is not None:
+        return
+    
+    try:
+        from numba import njit
+    except ImportError:
+        NUMBA_AVAILABLE = False
+        return
+    
+    kernels = (_kf_predict, _kf_update_gps, _kf_update_imu, _kf_step)
+    
+    # _kf_step calls the others, so it is wrapped last
+    _kf_predict = njit(cache=True)(_kf_predict)
+    _kf_update_gps = njit(cache=True)(_kf_update_gps)
+    _kf_update_imu = njit(cache=True)(_kf_update_imu)
+    _kf_step = njit(cache=True)(_kf_step)
+    
+    # njit compiles lazily, so missing pieces (e.g. scipy for np.linalg.solve)
+    # only show up on the first call - compile now with one tiny full step
+    try:
+        _kf_step(np.zeros(9, dtype=_DTYPE), np.eye(9, dtype=_DTYPE), np.ones(9, dtype=_DTYPE),
+                 np.eye(6, dtype=_DTYPE), np.eye(3, dtype=_DTYPE), np.zeros(6, dtype=_DTYPE), True,
+                 np.zeros(3, dtype=_DTYPE), True, _DTYPE(0.1), 1.0, 1.0)
+    except Exception as e:
+        print(f"Numba JIT unavailable, using NumPy kernels: {e}")
+        _kf_predict, _kf_update_gps, _kf_update_imu, _kf_step = kernels
+        NUMBA_AVAILABLE = False
+        return
+    NUMBA_AVAILABLE = True
+
+
 class KalmanFilter:
     def __init__(self):
+        _ensure_jit()
+        
         # State vector: [x, y, z, vx, vy, vz, roll, pitch, yaw]
-        self.state = np.zeros(9)
+        self.state = np.zeros(9, dtype=_DTYPE)
         
         # State covariance matrix
-        self.P = np.eye(9) * CONFIG.P_INIT
+        self.P = np.eye(9, dtype=_DTYPE) * _DTYPE(CONFIG.P_INIT)
         
         # Process noise covariance
         self.Q = np.diag([
             CONFIG.Q_POS, CONFIG.Q_POS, CONFIG.Q_POS,
             CONFIG.Q_VEL, CONFIG.Q_VEL, CONFIG.Q_VEL,
             CONFIG.Q_ATT, CONFIG.Q_ATT, CONFIG.Q_ATT
-        ])
+        ]).astype(_DTYPE)
+        self._Q_diag = np.diag(self.Q).copy()
         
         # GPS measurement noise covariance
         self.R_gps = np.diag([
             CONFIG.R_GPS_POS, CONFIG.R_GPS_POS, CONFIG.R_GPS_POS,
             CONFIG.R_GPS_VEL, CONFIG.R_GPS_VEL, CONFIG.R_GPS_VEL
-        ])
+        ]).astype(_DTYPE)
         
         # IMU measurement noise covariance
         self.R_imu = np.diag([
             CONFIG.R_IMU_ATT, CONFIG.R_IMU_ATT, CONFIG.R_IMU_ATT
-        ])
+        ]).astype(_DTYPE)
         
         # Timestamps for delta time calculation
         self.last_time = 0
@@ -36,6 +164,7 @@ class KalmanFilter:
         
         # Earth radius in meters
         self.EARTH_RADIUS = 6378137.0
+        self._inv_R = 1.0 / self.EARTH_RADIUS
         
         # Reference position for local coordinate conversion
         self.ref_lat = None
@@ -45,11 +174,20 @@ class KalmanFilter:
         # Uncertainty estimates
         self.pos_uncertainty = 10.0  # meters
         self.heading_uncertainty = 5.0  # degrees
+        
+        # Measurement vectors reused across updates
+        self._z_gps = np.zeros(6, dtype=_DTYPE)
+        self._z_imu = np.zeros(3, dtype=_DTYPE)
     
     def _set_reference_position(self, lat, lon, alt):
         self.ref_lat = lat
         self.ref_lon = lon
         self.ref_alt = alt
+        
+        # Reference trig is constant once set, cache it for the conversions
+        self._ref_lat_rad = math.radians(lat)
+        self._ref_lon_rad = math.radians(lon)
+        self._cos_ref_lat = math.cos(self._ref_lat_rad)
     
     def _geo_to_local(self, lat, lon, alt):
         """Convert geodetic coordinates to local ENU coordinates"""
@@ -57,15 +195,15 @@ class KalmanFilter:
             self._set_reference_position(lat, lon, alt)
             return 0.0, 0.0, 0.0
         
-        # Calculate distance using Haversine formula
-        lat1, lon1 = np.radians(self.ref_lat), np.radians(self.ref_lon)
-        lat2, lon2 = np.radians(lat), np.radians(lon)
-        
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+        # Small-angle (equirectangular) projection about the reference point
+        dlat = math.radians(lat) - self._ref_lat_rad
+        dlon = math.radians(lon) - self._ref_lon_rad
         
-        # East component
-        east = dlon * np.cos((lat1 + lat2) / 2) * self.EARTH_RADIUS
+        # East component - scaled by cos(ref_lat) rather than the midpoint
+        # latitude; the relative error is ~tan(ref_lat) * north / (2 * R),
+        # i.e. < 0.1 mm per metre east for each km north of the reference,
+        # and it keeps this conversion the exact inverse of _local_to_geo
+        east = dlon * self._cos_ref_lat * self.EARTH_RADIUS
         # North component
         north = dlat * self.EARTH_RADIUS
         # Up component
@@ -78,16 +216,16 @@ class KalmanFilter:
         if self.ref_lat is None:
             return 0.0, 0.0, 0.0
         
-        lat1, lon1 = np.radians(self.ref_lat), np.radians(self.ref_lon)
+        lat1, lon1 = self._ref_lat_rad, self._ref_lon_rad
         
-        dlat = north / self.EARTH_RADIUS
-        dlon = east / (self.EARTH_RADIUS * np.cos(lat1))
+        dlat = north * self._inv_R
+        dlon = east * self._inv_R / self._cos_ref_lat
         
         lat2 = lat1 + dlat
         lon2 = lon1 + dlon
         alt = self.ref_alt + up
         
-        return np.degrees(lat2), np.degrees(lon2), alt
+        return math.degrees(lat2), math.degrees(lon2), alt
     
     def predict(self, current_time):
         if not self.initialized:
@@ -100,122 +238,104 @@ class KalmanFilter:
         if dt <= 0:
             return
         
-        # State transition matrix
-        F = np.eye(9)
-        F[0, 3] = dt  # x += vx * dt
-        F[1, 4] = dt  # y += vy * dt
-        F[2, 5] = dt  # z += vz * dt
-        
-        # Predict state
-        self.state = F @ self.state
-        
-        # Predict covariance
-        self.P = F @ self.P @ F.T + self.Q * dt
+        self.state, self.P = _kf_predict(self.state, self.P, self._Q_diag, _DTYPE(dt))
         
         # Update position uncertainty based on diagonal of covariance matrix
-        self.pos_uncertainty = np.sqrt(np.mean([self.P[0,0], self.P[1,1]]))
-        self.heading_uncertainty = np.sqrt(self.P[8,8])
+        self.pos_uncertainty = math.sqrt(0.5 * (self.P[0, 0] + self.P[1, 1]))
+        self.heading_uncertainty = math.sqrt(self.P[8, 8])
         
         self.last_time = current_time
     
+    def step(self, current_time, gps_fix=None, attitude=None):
+        """Run predict and the available measurement updates in one kernel call
+        
+        Args:
+            current_time: Timestamp of this tick in seconds
+            gps_fix: (lat, lon, alt, speed, course) tuple, or None if no valid fix
+            attitude: (roll, pitch, yaw) in degrees, or None if no valid IMU data
+        """
+        dt = 0.0
+        if not self.initialized:
+            self.last_time = current_time
+            self.initialized = True
+        else:
+            dt = current_time - self.last_time
+            if dt > 0:
+                self.last_time = current_time
+        
+        if gps_fix is not None:
+            self._set_gps_measurement(*gps_fix)
+        
+        if attitude is not None:
+            z_imu = self._z_imu
+            z_imu[0] = attitude[0]
+            z_imu[1] = attitude[1]
+            z_imu[2] = attitude[2]
+        
+        self.state, self.P, self.pos_uncertainty, self.heading_uncertainty = _kf_step(
+            self.state, self.P, self._Q_diag, self.R_gps, self.R_imu,
+            self._z_gps, gps_fix is not None, self._z_imu, attitude is not None,
+            _DTYPE(dt), self.pos_uncertainty, self.heading_uncertainty
+        )
+    
     def update_gps(self, lat, lon, alt, speed, course, valid=True):
         if not valid:
             return
         
+        self._set_gps_measurement(lat, lon, alt, speed, course)
+        self.state, self.P = _kf_update_gps(self.state, self.P, self.R_gps, self._z_gps)
+        
+        # Update position uncertainty
+        self.pos_uncertainty = math.sqrt(0.5 * (self.P[0, 0] + self.P[1, 1]))
+    
+    def _set_gps_measurement(self, lat, lon, alt, speed, course):
+        """Fill the GPS measurement vector from a geodetic fix"""
         # Convert geodetic coordinates to local ENU
         x, y, z = self._geo_to_local(lat, lon, alt)
         
         # Convert speed and course to velocity components
-        course_rad = np.radians(course)
-        vx = speed * np.sin(course_rad)  # East component
-        vy = speed * np.cos(course_rad)  # North component
+        course_rad = math.radians(course)
+        vx = speed * math.sin(course_rad)  # East component
+        vy = speed * math.cos(course_rad)  # North component
         vz = 0.0  # Assuming no vertical velocity from GPS
         
         # GPS measurement vector [x, y, z, vx, vy, vz]
-        z_gps = np.array([x, y, z, vx, vy, vz])
-        
-        # Measurement matrix for GPS (position and velocity)
-        H_gps = np.zeros((6, 9))
-        H_gps[0, 0] = 1.0  # x
-        H_gps[1, 1] = 1.0  # y
-        H_gps[2, 2] = 1.0  # z
-        H_gps[3, 3] = 1.0  # vx
-        H_gps[4, 4] = 1.0  # vy
-        H_gps[5, 5] = 1.0  # vz
-        
-        # Innovation (measurement residual)
-        y = z_gps - H_gps @ self.state
-        
-        # Innovation covariance
-        S = H_gps @ self.P @ H_gps.T + self.R_gps
-        
-        # Kalman gain
-        K = self.P @ H_gps.T @ np.linalg.inv(S)
-        
-        # Update state
-        self.state = self.state + K @ y
-        
-        # Update covariance
-        I = np.eye(9)
-        self.P = (I - K @ H_gps) @ self.P
-        
-        # Update position uncertainty
-        self.pos_uncertainty = np.sqrt(np.mean([self.P[0,0], self.P[1,1]]))
+        z_gps = self._z_gps
+        z_gps[0] = x
+        z_gps[1] = y
+        z_gps[2] = z
+        z_gps[3] = vx
+        z_gps[4] = vy
+        z_gps[5] = vz
     
     def update_imu(self, roll, pitch, yaw, valid=True):
         if not valid:
             return
         
         # IMU measurement vector [roll, pitch, yaw]
-        z_imu = np.array([roll, pitch, yaw])
+        z_imu = self._z_imu
+        z_imu[0] = roll
+        z_imu[1] = pitch
+        z_imu[2] = yaw
         
-        # Measurement matrix for IMU (attitude only)
-        H_imu = np.zeros((3, 9))
-        H_imu[0, 6] = 1.0  # roll
-        H_imu[1, 7] = 1.0  # pitch
-        H_imu[2, 8] = 1.0  # yaw
-        
-        # Innovation (measurement residual)
-        y = z_imu - H_imu @ self.state
-        
-        # Special handling for yaw angle wrap-around
-        if y[2] > 180:
-            y[2] -= 360
-        elif y[2] < -180:
-            y[2] += 360
-        
-        # Innovation covariance
-        S = H_imu @ self.P @ H_imu.T + self.R_imu
-        
-        # Kalman gain
-        K = self.P @ H_imu.T @ np.linalg.inv(S)
-        
-        # Update state
-        self.state = self.state + K @ y
-        
-        # Update covariance
-        I = np.eye(9)
-        self.P = (I - K @ H_imu) @ self.P
+        self.state, self.P = _kf_update_imu(self.state, self.P, self.R_imu, z_imu)
         
         # Update heading uncertainty
-        self.heading_uncertainty = np.sqrt(self.P[8,8])
+        self.heading_uncertainty = math.sqrt(self.P[8, 8])
     
     def get_state(self):
         # Convert local ENU coordinates back to geodetic
-        lat, lon, alt = self._local_to_geo(self.state[0], self.state[1], self.state[2])
+        x, y, z, vx, vy, vz, roll, pitch, yaw = self.state.tolist()
+        lat, lon, alt = self._local_to_geo(x, y, z)
         
         # Calculate speed from velocity components
-        vx, vy, vz = self.state[3], self.state[4], self.state[5]
-        speed = np.sqrt(vx**2 + vy**2)
+        speed = math.sqrt(vx * vx + vy * vy)
         
         # Calculate course from velocity components
-        course = np.degrees(np.arctan2(vx, vy))
+        course = math.degrees(math.atan2(vx, vy))
         if course < 0:
             course += 360.0
             
-        # Get attitude angles
-        roll, pitch, yaw = self.state[6], self.state[7], self.state[8]
-        
         return {
             'latitude': lat,
             'longitude': lon,
@@ -0,0 +1,74 @@
+# coding: utf-8
+import select
+import threading
+
+
+class PositioningReactor:
+    """Single epoll-driven thread that services the GPS and IMU serial ports"""
+
+    def __init__(self):
+        self._ep = select.epoll()
+        self._cbs = {}
+        self._cbs_lock = threading.Lock()
+
+        # Thread control
+        self.running = False
+        self.thread = None
+
+    def add(self, fd, callback, on_hangup=None):
+        """Register a readable callback for a file descriptor
+
+        The callback returns False when its read failed. On a failed read or a
+        hangup/error event the fd is unregistered and on_hangup is called, so a
+        dead device is not polled again until it is explicitly re-added.
+        """
+        with self._cbs_lock:
+            # Level-triggered: callbacks read what is available, anything left
+            # over is reported again on the next poll
+            self._ep.register(fd, select.EPOLLIN)
+            self._cbs[fd] = (callback, on_hangup)
+
+    def remove(self, fd):
+        """Unregister a file descriptor, returns True if nothing is left to watch"""
+        with self._cbs_lock:
+            if self._cbs.pop(fd, None) is not None:
+                try:
+                    self._ep.unregister(fd)
+                except (OSError, ValueError):
+                    pass  # fd already closed
+            return not self._cbs
+
+    def _run(self):
+        while self.running:
+            try:
+                events = self._ep.poll(1.0)
+            except InterruptedError:
+                continue
+
+            for fd, mask in events:
+                entry = self._cbs.get(fd)
+                if entry is None:
+                    continue
+                callback, on_hangup = entry
+                if mask & (select.EPOLLHUP | select.EPOLLERR) or callback() is False:
+                    # Level-triggered epoll keeps reporting a dead fd - drop it
+                    # instead of spinning on it
+                    self.remove(fd)
+                    if on_hangup is not None:
+                        on_hangup()
+
+    def start(self):
+        if self.running:
+            return True
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.5)
+        self.thread = None
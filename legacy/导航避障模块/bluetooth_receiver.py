@@ -4,20 +4,31 @@
 # 兼容现有电机控制蓝牙协议，支持JSON和文本两种坐标输入格式
 
 import time
+import math
 import json
+from dataclasses import asdict
 import re
-import threading
-from typing import Dict, Any, Optional, Callable
-from datetime import datetime
+from typing import Dict, Any, Optional, Callable, Tuple, Union
 from enum import Enum
+import numpy as np
 
 # 导入现有蓝牙通信架构
 import sys
 import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '电机驱动模块'))
+_MOTOR_DIR = os.path.join(os.path.dirname(__file__), '电机驱动模块')
+if _MOTOR_DIR not in sys.path:
+    sys.path.append(_MOTOR_DIR)
 from bluetooth_comm import BluetoothComm, CommandType, ProtocolType
 
-from config import get_navigation_config, get_bluetooth_config, get_algorithm_config
+from config import (get_navigation_config_readonly, get_algorithm_config_frozen,
+                    get_output_config, SYSTEM_CONFIG)
+
+# 优先使用orjson解析JSON命令，未安装时回退到标准库json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 class NavigationCommandType(Enum):
     """导航命令类型枚举 - 扩展现有命令类型"""
@@ -27,38 +38,205 @@ class NavigationCommandType(Enum):
     GET_POSITION = "GET_POSITION"  # 获取当前位置
     GET_TARGET = "GET_TARGET"  # 获取目标坐标
 
+def _pack_set_target(command: str, json_data: Dict[str, Any]) -> Dict[str, Any]:
+    """SET_TARGET命令 - 提取坐标参数"""
+    params = json_data.get('params', {})
+    get = params.get
+    return {
+        'command': command,
+        'lat': get('lat'),
+        'lng': get('lng'),
+        'alt': get('alt', 0.0)
+    }
+
+def _pack_plain(command: str, json_data: Dict[str, Any]) -> Dict[str, Any]:
+    """无参数导航命令"""
+    return {'command': command}
+
+# 文本命令正则 - 模块加载时编译一次
+_NUM = r'([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)'
+_TARGET_RE = re.compile(
+    r'TARGET:\s*' + _NUM + r'\s*,\s*' + _NUM + r'\s*(?:,\s*' + _NUM + r'\s*)?\Z', re.I)
+_NAV_RE = re.compile(r'NAVIGATE:\s*(START|STOP)\s*\Z', re.I)
+_NAV_ACTIONS: Dict[str, str] = {'START': 'NAVIGATE_START', 'STOP': 'NAVIGATE_STOP'}
+
+# 坐标取整比例 (6位/2位小数)
+_R6 = 1e6
+_R2 = 1e2
+
+# 本地时间ISO字符串缓存 (分钟序号, "YYYY-MM-DDTHH:MM:"前缀)，跨分钟时整体替换
+_iso_minute = (None, '')
+
+def _iso_timestamp(ts: float) -> str:
+    """时间戳转本地ISO时间字符串，与datetime.fromtimestamp(ts).isoformat()输出一致"""
+    global _iso_minute
+    # 与datetime相同: 整数秒与小数部分分开取整到微秒
+    frac, whole = math.modf(ts)
+    secs, us = int(whole), round(frac * 1e6)
+    if us >= 1000000:
+        secs, us = secs + 1, us - 1000000
+    minute, sec = divmod(secs, 60)
+    cached_minute, prefix = _iso_minute
+    if minute != cached_minute:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:', time.localtime(minute * 60))
+        _iso_minute = (minute, prefix)
+    if us:
+        return f'{prefix}{sec:02d}.{us:06d}'
+    return f'{prefix}{sec:02d}'
+
+# 未设置目标时的快照
+_NO_TARGET = (None, 0, False)
+
+# 坐标验证通过结果 - 共享只读对象，调用方不得修改
+_VALID = {'valid': True}
+
+# 导航JSON命令分发表 - 命令字符串 -> 规范化函数
+_JSON_DISPATCH: Dict[str, Callable[[str, Dict[str, Any]], Dict[str, Any]]] = {
+    'SET_TARGET': _pack_set_target,
+    'NAVIGATE_START': _pack_plain,
+    'NAVIGATE_STOP': _pack_plain,
+    'GET_POSITION': _pack_plain,
+    'GET_TARGET': _pack_plain
+}
+
+# 批量坐标处理内核 - 用于航点日志回放/航线批量导入，安装numba时JIT编译
+_prange = range
+
+def _validate_batch(lat, lng, alt, lat_lo, lat_hi, lng_lo, lng_hi, alt_lo, alt_hi, out):
+    for i in range(lat.shape[0]):
+        out[i] = (lat_lo <= lat[i] <= lat_hi) and (lng_lo <= lng[i] <= lng_hi) and (alt_lo <= alt[i] <= alt_hi)
+
+def _standardize_batch(lat, lng, alt, out_lat, out_lng, out_alt):
+    # 与standardize_coordinates相同的四舍五入(远离零)，输入须为已验证的有限值
+    for i in _prange(lat.shape[0]):
+        out_lat[i] = int(lat[i] * 1e6 + (0.5 if lat[i] >= 0 else -0.5)) / 1e6
+        out_lng[i] = int(lng[i] * 1e6 + (0.5 if lng[i] >= 0 else -0.5)) / 1e6
+        out_alt[i] = int(alt[i] * 1e2 + (0.5 if alt[i] >= 0 else -0.5)) / 1e2
+
+NUMBA_AVAILABLE = None  # Unknown until _ensure_jit() has run
+
+def _ensure_jit():
+    """首次批量调用时按固定签名编译内核，未安装numba时使用NumPy向量化实现"""
+    global NUMBA_AVAILABLE, _prange, _validate_batch, _standardize_batch
+    if NUMBA_AVAILABLE is not None:
+        return
+    
+    try:
+        from numba import njit, prange
+    except ImportError:
+        NUMBA_AVAILABLE = False
+        return
+    
+    # 按签名编译在此处立即进行；编译或预热调用失败(如缺少并行后端)时回退到NumPy实现
+    try:
+        # 验证内核不使用fastmath，以保证NaN坐标被判为无效
+        _prange = prange
+        validate_batch = njit(
+            'void(float64[::1], float64[::1], float64[::1], float64, float64, '
+            'float64, float64, float64, float64, boolean[::1])',
+            cache=True)(_validate_batch)
+        standardize_batch = njit(
+            'void(float64[::1], float64[::1], float64[::1], '
+            'float64[::1], float64[::1], float64[::1])',
+            cache=True, parallel=True)(_standardize_batch)
+        
+        one = np.zeros(1)
+        validate_batch(one, one, one, -1.0, 1.0, -1.0, 1.0, -1.0, 1.0, np.empty(1, dtype=np.bool_))
+        standardize_batch(one, one, one, np.empty(1), np.empty(1), np.empty(1))
+    except Exception as e:
+        print(f"Numba JIT编译失败，使用NumPy实现: {e}")
+        _prange = range
+        NUMBA_AVAILABLE = False
+        return
+    
+    _validate_batch = validate_batch
+    _standardize_batch = standardize_batch
+    NUMBA_AVAILABLE = True
+
+def _as_coord_array(values, n: Optional[int] = None) -> np.ndarray:
+    if values is None:
+        return np.zeros(n, dtype=np.float64)
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+def _make_coordinate_validator(lat_range: tuple, lng_range: tuple,
+                               alt_range: tuple) -> Callable[..., Dict[str, Any]]:
+    """按给定范围生成坐标验证函数"""
+    lat_lo, lat_hi = lat_range
+    lng_lo, lng_hi = lng_range
+    alt_lo, alt_hi = alt_range
+    
+    def validate_coordinates(lat: float, lng: float, alt: float = 0.0) -> Dict[str, Any]:
+        """验证坐标数据有效性"""
+        try:
+            if lat_lo <= lat <= lat_hi and lng_lo <= lng <= lng_hi and alt_lo <= alt <= alt_hi:
+                return _VALID
+        except TypeError as e:
+            return {'valid': False, 'error': f'坐标验证错误: {e}'}
+        
+        # 慢速路径: 构造超出范围的错误结果
+        if not (lat_lo <= lat <= lat_hi):
+            return {'valid': False, 'error': f'纬度超出范围 {lat_range}: {lat}'}
+        if not (lng_lo <= lng <= lng_hi):
+            return {'valid': False, 'error': f'经度超出范围 {lng_range}: {lng}'}
+        return {'valid': False, 'error': f'高度超出范围 {alt_range}: {alt}'}
+    
+    return validate_coordinates
+
 class NavigationBluetoothReceiver(BluetoothComm):
     """导航蓝牙坐标接收器 - 继承现有蓝牙通信架构"""
     
+    # 子类自有实例属性放入槽位; target_*为只读属性，不占槽位
+    __slots__ = ('nav_config', 'bluetooth_nav_config', 'algorithm_config', 'coord_validation',
+                 'lat_range', 'lng_range', 'alt_range', '_coord_validation_status', 'validate_coordinates',
+                 '_lat_lo', '_lat_hi', '_lng_lo', '_lng_hi', '_alt_lo', '_alt_hi',
+                 'target_callback', 'navigate_start_callback', 'navigate_stop_callback',
+                 'position_callback', 'supported_formats', '_target_snapshot', '_response_cache',
+                 '_emit_iso')
+    
+    # 导航硬件配置只读视图，所有实例共享 (update_config的修改同样可见)
+    _NAV = get_navigation_config_readonly()
+    
+    
+    # 导航命令 -> 处理方法名 (与NavigationCommandType取值一致)
+    _NAV_HANDLER_NAMES = {
+        'SET_TARGET': '_handle_set_target_command',
+        'NAVIGATE_START': '_handle_navigate_start_command',
+        'NAVIGATE_STOP': '_handle_navigate_stop_command',
+        'GET_POSITION': '_handle_get_position_command',
+        'GET_TARGET': '_handle_get_target_command'
+    }
+    
     def __init__(self, config_path: str = None):
         """初始化导航蓝牙接收器"""
         # 调用父类初始化
         super().__init__(config_path)
         
         # 导航系统配置
-        self.nav_config = get_navigation_config()
-        self.bluetooth_nav_config = self.nav_config['BLUETOOTH']
-        self.algorithm_config = get_algorithm_config()
+        self.nav_config = self._NAV
+        self.bluetooth_nav_config = self._NAV['BLUETOOTH']
+        # 算法配置不可变实例 - 每个接收器创建时获取，update_config修改算法配置后新建的接收器即可生效
+        self.algorithm_config = get_algorithm_config_frozen()
         
         # 坐标验证配置
-        self.coord_validation = self.algorithm_config['coordinate_validation']
-        self.lat_range = self.coord_validation['latitude_range']  # (-90.0, 90.0)
-        self.lng_range = self.coord_validation['longitude_range']  # (-180.0, 180.0)
-        self.alt_range = self.coord_validation['altitude_range']  # (-100.0, 1000.0)
+        cv = self.coord_validation = self.algorithm_config.coordinate_validation
+        self.lat_range = cv.latitude_range  # (-90.0, 90.0)
+        self.lng_range = cv.longitude_range  # (-180.0, 180.0)
+        self.alt_range = cv.altitude_range  # (-100.0, 1000.0)
+        self._lat_lo, self._lat_hi = cv.latitude_range
+        self._lng_lo, self._lng_hi = cv.longitude_range
+        self._alt_lo, self._alt_hi = cv.altitude_range
+        self._coord_validation_status = asdict(cv)  # 状态输出用(可JSON序列化)
+        # 坐标验证 - 边界按本实例的配置固化为闭包自由变量，调用形式不变: self.validate_coordinates(lat, lng, alt)
+        self.validate_coordinates = _make_coordinate_validator(
+            cv.latitude_range, cv.longitude_range, cv.altitude_range)
         
         # 目标坐标数据
-        self.target_coordinates = None  # 当前目标坐标
-        self.target_set = False  # 目标是否已设置
-        self.target_timestamp = 0  # 目标设置时间戳
+        # (目标坐标, 设置时间戳, 是否已设置) - 整体替换发布，读取方无需加锁
+        self._target_snapshot = _NO_TARGET
         
         # 扩展命令处理器 - 添加导航命令支持
-        self.command_handlers.update({
-            NavigationCommandType.SET_TARGET.value: self._handle_set_target_command,
-            NavigationCommandType.NAVIGATE_START.value: self._handle_navigate_start_command,
-            NavigationCommandType.NAVIGATE_STOP.value: self._handle_navigate_stop_command,
-            NavigationCommandType.GET_POSITION.value: self._handle_get_position_command,
-            NavigationCommandType.GET_TARGET.value: self._handle_get_target_command
-        })
+        self.command_handlers.update(
+            {cmd: getattr(self, name) for cmd, name in self._NAV_HANDLER_NAMES.items()})
         
         # 导航回调函数 - 用于与导航系统交互
         self.target_callback = None  # 目标坐标设置回调
@@ -66,20 +244,28 @@ class NavigationBluetoothReceiver(BluetoothComm):
         self.navigate_stop_callback = None  # 停止导航回调
         self.position_callback = None  # 位置查询回调
         
+        # 固定文案响应缓存 (命令, 状态, 消息) -> 响应字典
+        self._response_cache = {}
+        
+        # 坐标中的ISO时间字符串仅用于日志/调试，关闭调试信息时不生成
+        self._emit_iso = get_output_config()['include_debug_info']
+        
         # 坐标格式支持
         self.supported_formats = self.bluetooth_nav_config['command_formats']
         
-        print(f"导航蓝牙接收器初始化完成 - 服务名: {self.bluetooth_nav_config['service_name']}")
+        if SYSTEM_CONFIG['debug_logging']:
+            print(f"导航蓝牙接收器初始化完成 - 服务名: {self.bluetooth_nav_config['service_name']}")
     
     def _parse_text_command(self, text: str) -> Dict[str, Any]:
         """扩展文本格式命令解析 - 添加坐标命令支持"""
         try:
-            # 首先尝试解析导航相关命令
-            if text.upper().startswith('TARGET:'):
+            # 首先尝试解析导航相关命令 (只对前缀做大写转换，不复制整条报文)
+            head = text[:9].upper()
+            if head.startswith('TARGET:'):
                 return self._parse_target_text_command(text)
-            elif text.upper().startswith('NAVIGATE:'):
+            elif head == 'NAVIGATE:':
                 return self._parse_navigate_text_command(text)
-            elif text.upper().startswith('POSITION'):
+            elif head.startswith('POSITION'):
                 return {'command': 'GET_POSITION'}
             else:
                 # 调用父类方法处理其他命令
@@ -90,6 +276,18 @@ class NavigationBluetoothReceiver(BluetoothComm):
     
     def _parse_target_text_command(self, text: str) -> Dict[str, Any]:
         """解析目标坐标文本命令 - 格式: TARGET:lat,lng[,alt]"""
+        # 快速路径: 格式正确的命令一次正则匹配完成
+        m = _TARGET_RE.match(text)
+        if m:
+            lat, lng, alt = m.groups()
+            return {
+                'command': 'SET_TARGET',
+                'lat': float(lat),
+                'lng': float(lng),
+                'alt': float(alt) if alt else 0.0
+            }
+        
+        # 慢速路径: 逐项解析以给出具体错误信息
         try:
             # 提取坐标部分: TARGET:39.9142,116.4174,100
             coords_str = text[7:].strip()  # 去掉"TARGET:"前缀
@@ -121,75 +319,136 @@ class NavigationBluetoothReceiver(BluetoothComm):
     
     def _parse_navigate_text_command(self, text: str) -> Dict[str, Any]:
         """解析导航控制文本命令 - 格式: NAVIGATE:START/STOP"""
+        m = _NAV_RE.match(text)
+        if m:
+            return {'command': _NAV_ACTIONS[m.group(1).upper()]}
+        
         try:
             # 提取导航动作: NAVIGATE:START
             action_str = text[9:].strip().upper()  # 去掉"NAVIGATE:"前缀
             
-            if action_str == 'START':
-                return {'command': 'NAVIGATE_START'}
-            elif action_str == 'STOP':
-                return {'command': 'NAVIGATE_STOP'}
-            else:
-                return {'error': f'不支持的导航动作: {action_str}'}
+            return {'error': f'不支持的导航动作: {action_str}'}
                 
         except Exception as e:
             return {'error': f'导航命令解析错误: {e}'}
     
+    def parse_command(self, data: Union[str, bytes]) -> Dict[str, Any]:
+        """JSON命令直接用orjson解析后分发，其余格式交给父类处理"""
+        text = data.strip() if isinstance(data, (str, bytes)) else data
+        if text and text[:1] in ('{', b'{'):
+            try:
+                json_data = _json_loads(text)
+            except ValueError:
+                return super().parse_command(data)
+            if isinstance(json_data, dict):
+                return self._parse_json_command(json_data)
+        return super().parse_command(data)
+    
     def _parse_json_command(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
-        """扩展JSON格式命令解析 - 添加坐标命令支持"""
+        """扩展JSON格式命令解析 - 添加坐标命令支持
+        
+        命令名约定为大写 (如 "SET_TARGET")，小写命令仍可识别但需额外转换一次
+        """
         try:
-            command = json_data.get('command', '').upper()
+            command = json_data.get('command', '')
             
             # 处理导航相关JSON命令
-            if command == 'SET_TARGET':
-                params = json_data.get('params', {})
-                return {
-                    'command': 'SET_TARGET',
-                    'lat': params.get('lat'),
-                    'lng': params.get('lng'),
-                    'alt': params.get('alt', 0.0)
-                }
-            elif command in ['NAVIGATE_START', 'NAVIGATE_STOP', 'GET_POSITION', 'GET_TARGET']:
-                return {'command': command}
-            else:
-                # 调用父类方法处理其他命令
-                return super()._parse_json_command(json_data)
+            handler = _JSON_DISPATCH.get(command)
+            if handler is None:
+                command = command.upper()
+                handler = _JSON_DISPATCH.get(command)
+            if handler is not None:
+                return handler(command, json_data)
+            
+            # 调用父类方法处理其他命令
+            return super()._parse_json_command(json_data)
                 
         except Exception as e:
             return {'error': f'导航JSON命令解析错误: {e}'}
     
-    def validate_coordinates(self, lat: float, lng: float, alt: float = 0.0) -> Dict[str, Any]:
-        """验证坐标数据有效性"""
-        try:
-            # 纬度范围检查
-            if not (self.lat_range[0] <= lat <= self.lat_range[1]):
-                return {'valid': False, 'error': f'纬度超出范围 {self.lat_range}: {lat}'}
-            
-            # 经度范围检查
-            if not (self.lng_range[0] <= lng <= self.lng_range[1]):
-                return {'valid': False, 'error': f'经度超出范围 {self.lng_range}: {lng}'}
-            
-            # 高度范围检查
-            if not (self.alt_range[0] <= alt <= self.alt_range[1]):
-                return {'valid': False, 'error': f'高度超出范围 {self.alt_range}: {alt}'}
-            
-            return {'valid': True}
-            
-        except Exception as e:
-            return {'valid': False, 'error': f'坐标验证错误: {e}'}
+    def validate_coordinates_batch(self, lat, lng, alt=None) -> np.ndarray:
+        """批量验证坐标 - 返回每个坐标是否有效的布尔数组"""
+        _ensure_jit()
+        lat = _as_coord_array(lat)
+        lng = _as_coord_array(lng)
+        alt = _as_coord_array(alt, lat.shape[0])
+        
+        if NUMBA_AVAILABLE:
+            out = np.empty(lat.shape[0], dtype=np.bool_)
+            _validate_batch(lat, lng, alt, self._lat_lo, self._lat_hi,
+                            self._lng_lo, self._lng_hi, self._alt_lo, self._alt_hi, out)
+            return out
+        
+        return ((lat >= self._lat_lo) & (lat <= self._lat_hi) &
+                (lng >= self._lng_lo) & (lng <= self._lng_hi) &
+                (alt >= self._alt_lo) & (alt <= self._alt_hi))
     
-    def standardize_coordinates(self, lat: float, lng: float, alt: float = 0.0) -> Dict[str, Any]:
-        """标准化坐标格式"""
+    def standardize_coordinates_batch(self, lat, lng, alt=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """批量标准化坐标 - 返回(纬度, 经度, 高度)数组，输入须先通过验证"""
+        _ensure_jit()
+        lat = _as_coord_array(lat)
+        lng = _as_coord_array(lng)
+        alt = _as_coord_array(alt, lat.shape[0])
+        
+        if NUMBA_AVAILABLE:
+            out_lat = np.empty_like(lat)
+            out_lng = np.empty_like(lng)
+            out_alt = np.empty_like(alt)
+            _standardize_batch(lat, lng, alt, out_lat, out_lng, out_alt)
+            return out_lat, out_lng, out_alt
+        
+        return (np.trunc(lat * _R6 + np.copysign(0.5, lat)) / _R6,
+                np.trunc(lng * _R6 + np.copysign(0.5, lng)) / _R6,
+                np.trunc(alt * _R2 + np.copysign(0.5, alt)) / _R2)
+    
+    def standardize_coordinates(self, lat: float, lng: float, alt: float = 0.0,
+                                ts: Optional[float] = None) -> Dict[str, Any]:
+        """标准化坐标格式 - ts为报文接收时间戳，未提供时取当前时间"""
+        # 对外API可能传入字符串/整数坐标，统一转换为浮点数后再取整
+        lat = float(lat)
+        lng = float(lng)
+        alt = float(alt)
+        if ts is None:
+            ts = time.time()
+        if alt == 0.0:
+            return self._standardize_fast(lat, lng, ts)
+        return {
+            'lat': int(lat * _R6 + (0.5 if lat >= 0 else -0.5)) / _R6,  # 纬度保留6位小数
+            'lng': int(lng * _R6 + (0.5 if lng >= 0 else -0.5)) / _R6,  # 经度保留6位小数
+            'alt': int(alt * _R2 + (0.5 if alt >= 0 else -0.5)) / _R2,  # 高度保留2位小数
+            'timestamp': ts,
+            'datetime': _iso_timestamp(ts) if self._emit_iso else None
+        }
+    
+    def _standardize_fast(self, lat: float, lng: float, ts: float) -> Dict[str, Any]:
+        """标准化坐标格式 - 无高度(TARGET:lat,lng)的常见情况，跳过高度取整"""
         return {
-            'lat': round(float(lat), 6),  # 纬度保留6位小数
-            'lng': round(float(lng), 6),  # 经度保留6位小数
-            'alt': round(float(alt), 2),  # 高度保留2位小数
-            'timestamp': time.time(),
-            'datetime': datetime.now().isoformat()
+            'lat': int(lat * _R6 + (0.5 if lat >= 0 else -0.5)) / _R6,
+            'lng': int(lng * _R6 + (0.5 if lng >= 0 else -0.5)) / _R6,
+            'alt': 0.0,
+            'timestamp': ts,
+            'datetime': _iso_timestamp(ts) if self._emit_iso else None
         }
     
+    def _static_error(self, command: str, message: str) -> Dict[str, Any]:
+        """固定文案的错误响应 - 首次构造后复用，调用方不得修改"""
+        key = (command, 'error', message)
+        response = self._response_cache.get(key)
+        if response is None:
+            response = self._response_cache[key] = self._create_error_response(command, message)
+        return response
+    
+    def _static_success(self, command: str, message: str) -> Dict[str, Any]:
+        """固定文案且无数据的成功响应 - 首次构造后复用，调用方不得修改"""
+        key = (command, 'success', message)
+        response = self._response_cache.get(key)
+        if response is None:
+            response = self._response_cache[key] = self._create_success_response(command, message)
+        return response
+    
     def _handle_set_target_command(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """处理设置目标坐标命令"""
+        ts = time.time()  # 报文接收时间戳，后续处理复用
         try:
             lat = params.get('lat')
             lng = params.get('lng')
@@ -197,7 +456,7 @@ class NavigationBluetoothReceiver(BluetoothComm):
             
             # 检查必需参数
             if lat is None or lng is None:
-                return self._create_error_response('SET_TARGET', '缺少纬度或经度参数')
+                return self._static_error('SET_TARGET', '缺少纬度或经度参数')
             
             # 坐标验证
             validation = self.validate_coordinates(lat, lng, alt)
@@ -205,13 +464,10 @@ class NavigationBluetoothReceiver(BluetoothComm):
                 return self._create_error_response('SET_TARGET', validation['error'])
             
             # 标准化坐标格式
-            standardized_coords = self.standardize_coordinates(lat, lng, alt)
+            standardized_coords = self.standardize_coordinates(lat, lng, alt, ts)
             
             # 更新目标坐标
-            with self._lock:
-                self.target_coordinates = standardized_coords
-                self.target_set = True
-                self.target_timestamp = time.time()
+            self._target_snapshot = (standardized_coords, ts, True)
             
             # 调用外部回调函数
             if self.target_callback:
@@ -219,15 +475,15 @@ class NavigationBluetoothReceiver(BluetoothComm):
                 if result:
                     return self._create_success_response(
                         'SET_TARGET', 
-                        f'目标坐标已设置: ({lat:.6f}, {lng:.6f}, {alt:.2f})',
+                        '目标坐标已设置',
                         standardized_coords
                     )
                 else:
-                    return self._create_error_response('SET_TARGET', '目标坐标设置失败')
+                    return self._static_error('SET_TARGET', '目标坐标设置失败')
             else:
                 return self._create_success_response(
                     'SET_TARGET',
-                    f'目标坐标已接收: ({lat:.6f}, {lng:.6f}, {alt:.2f})',
+                    '目标坐标已接收',
                     standardized_coords
                 )
                 
@@ -237,17 +493,18 @@ class NavigationBluetoothReceiver(BluetoothComm):
     def _handle_navigate_start_command(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """处理开始导航命令"""
         try:
-            if not self.target_set:
-                return self._create_error_response('NAVIGATE_START', '未设置目标坐标')
+            target, _, target_set = self._target_snapshot
+            if not target_set:
+                return self._static_error('NAVIGATE_START', '未设置目标坐标')
             
             if self.navigate_start_callback:
-                result = self.navigate_start_callback(self.target_coordinates)
+                result = self.navigate_start_callback(target)
                 if result:
-                    return self._create_success_response('NAVIGATE_START', '导航已启动')
+                    return self._static_success('NAVIGATE_START', '导航已启动')
                 else:
-                    return self._create_error_response('NAVIGATE_START', '导航启动失败')
+                    return self._static_error('NAVIGATE_START', '导航启动失败')
             else:
-                return self._create_error_response('NAVIGATE_START', '导航启动回调未设置')
+                return self._static_error('NAVIGATE_START', '导航启动回调未设置')
                 
         except Exception as e:
             return self._create_error_response('NAVIGATE_START', f'导航启动处理错误: {e}')
@@ -258,11 +515,11 @@ class NavigationBluetoothReceiver(BluetoothComm):
             if self.navigate_stop_callback:
                 result = self.navigate_stop_callback()
                 if result:
-                    return self._create_success_response('NAVIGATE_STOP', '导航已停止')
+                    return self._static_success('NAVIGATE_STOP', '导航已停止')
                 else:
-                    return self._create_error_response('NAVIGATE_STOP', '导航停止失败')
+                    return self._static_error('NAVIGATE_STOP', '导航停止失败')
             else:
-                return self._create_error_response('NAVIGATE_STOP', '导航停止回调未设置')
+                return self._static_error('NAVIGATE_STOP', '导航停止回调未设置')
                 
         except Exception as e:
             return self._create_error_response('NAVIGATE_STOP', f'导航停止处理错误: {e}')
@@ -274,7 +531,7 @@ class NavigationBluetoothReceiver(BluetoothComm):
                 position_data = self.position_callback()
                 return self._create_success_response('GET_POSITION', '位置查询成功', position_data)
             else:
-                return self._create_error_response('GET_POSITION', '位置查询回调未设置')
+                return self._static_error('GET_POSITION', '位置查询回调未设置')
                 
         except Exception as e:
             return self._create_error_response('GET_POSITION', f'位置查询处理错误: {e}')
@@ -282,21 +539,38 @@ class NavigationBluetoothReceiver(BluetoothComm):
     def _handle_get_target_command(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """处理获取目标坐标命令"""
         try:
-            with self._lock:
-                if self.target_set and self.target_coordinates:
-                    return self._create_success_response(
-                        'GET_TARGET', 
-                        '目标坐标查询成功', 
-                        self.target_coordinates
-                    )
-                else:
-                    return self._create_error_response('GET_TARGET', '未设置目标坐标')
+            target, _, target_set = self._target_snapshot
+            if target_set and target:
+                return self._create_success_response(
+                    'GET_TARGET', 
+                    '目标坐标查询成功', 
+                    target
+                )
+            else:
+                return self._static_error('GET_TARGET', '未设置目标坐标')
                     
         except Exception as e:
             return self._create_error_response('GET_TARGET', f'目标坐标查询错误: {e}')
     
-    def set_navigation_callbacks(self, target_cb=None, nav_start_cb=None, 
-                               nav_stop_cb=None, position_cb=None):
+    @property
+    def target_coordinates(self) -> Optional[Dict[str, Any]]:
+        """当前目标坐标"""
+        return self._target_snapshot[0]
+    
+    @property
+    def target_timestamp(self) -> float:
+        """目标设置时间戳"""
+        return self._target_snapshot[1]
+    
+    @property
+    def target_set(self) -> bool:
+        """目标是否已设置"""
+        return self._target_snapshot[2]
+    
+    def set_navigation_callbacks(self, target_cb: Optional[Callable] = None,
+                               nav_start_cb: Optional[Callable] = None,
+                               nav_stop_cb: Optional[Callable] = None,
+                               position_cb: Optional[Callable] = None) -> None:
         """设置导航回调函数"""
         self.target_callback = target_cb
         self.navigate_start_callback = nav_start_cb
@@ -305,31 +579,27 @@ class NavigationBluetoothReceiver(BluetoothComm):
         print("导航蓝牙回调函数已设置")
     
     def get_target_coordinates(self) -> Optional[Dict[str, Any]]:
-        """获取当前目标坐标"""
-        with self._lock:
-            return self.target_coordinates.copy() if self.target_coordinates else None
+        """获取当前目标坐标 - 共享快照，调用方不得修改"""
+        return self._target_snapshot[0]
     
-    def clear_target(self):
+    def clear_target(self) -> None:
         """清除目标坐标"""
-        with self._lock:
-            self.target_coordinates = None
-            self.target_set = False
-            self.target_timestamp = 0
+        self._target_snapshot = _NO_TARGET
         print("目标坐标已清除")
     
     def get_navigation_status(self) -> Dict[str, Any]:
         """获取导航状态信息"""
         base_status = self.get_status()
-        with self._lock:
-            base_status.update({
-                'target_set': self.target_set,
-                'target_coordinates': self.target_coordinates,
-                'target_timestamp': self.target_timestamp,
-                'coordinate_validation': self.coord_validation
-            })
+        target, target_timestamp, target_set = self._target_snapshot
+        base_status.update({
+            'target_set': target_set,
+            'target_coordinates': target,
+            'target_timestamp': target_timestamp,
+            'coordinate_validation': self._coord_validation_status
+        })
         return base_status
     
-    def get_coordinate_api(self):
+    def get_coordinate_api(self) -> Dict[str, Callable]:
         """获取坐标接收API接口 - 供导航系统调用"""
         return {
             'get_target': self.get_target_coordinates,
@@ -376,6 +646,14 @@ def test_navigation_bluetooth():
         result = receiver.parse_command(cmd)
         print(f"   '{cmd}' -> {result}")
     
+    # 测试坐标标准化 (字符串/整数输入与浮点输入结果一致)
+    print("\n3. 坐标标准化测试:")
+    for lat, lng, alt in [('39.1', '116', 0), (39, 116, '12.345'), (39.1234567, 116.0, 0.0)]:
+        result = receiver.standardize_coordinates(lat, lng, alt, ts=0.0)
+        assert result['lat'] == round(float(lat), 6) and result['lng'] == round(float(lng), 6), result
+        assert result['alt'] == round(float(alt), 2) and isinstance(result['alt'], float), result
+        print(f"   ({lat!r}, {lng!r}, {alt!r}) -> {result['lat']}, {result['lng']}, {result['alt']}")
+    
     print("\n=== 导航蓝牙坐标接收器测试完成 ===")
 
 if __name__ == "__main__":
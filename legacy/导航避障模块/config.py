@@ -2,6 +2,9 @@
 # 无人船自主定位导航系统统一配置文件 - 基于地平线RDKX5开发板
 # 复用现有传感器模块和电机驱动模块配置管理架构，确保参数集中管理和易于维护
 
+from dataclasses import dataclass
+from types import MappingProxyType
+
 # 导航系统硬件配置 - 基于RDKX5引脚映射和硬件规格
 NAVIGATION_CONFIG = {
     'GPS_IMU': {
@@ -21,6 +24,7 @@ NAVIGATION_CONFIG = {
         'safe_distance': 1500,  # 安全距离阈值(毫米)
         'warning_distance': 3000,  # 警告距离阈值(毫米)
         'measurement_range': (30, 4500),  # 测量范围(毫米)
+        'read_timeout': 0.15,  # 阻塞读取超时(秒)，略大于模块100ms输出周期
         'enabled': True  # 超声波避障使能状态
     },
     'BLUETOOTH': {
@@ -76,6 +80,7 @@ NAVIGATION_ALGORITHM_CONFIG = {
     'speed_reduction_distance': 50.0,  # 减速距离(米)
     'waypoint_tolerance': 10.0,  # 航点容差(米)
     'max_heading_error': 45.0,  # 最大航向误差(度)
+    'local_distance_threshold': 100.0,  # 低于该距离时用等距圆柱近似代替Haversine计算距离和方位角(米)
     'coordinate_validation': {  # 坐标验证范围
         'latitude_range': (-90.0, 90.0),  # 纬度范围
         'longitude_range': (-180.0, 180.0),  # 经度范围
@@ -118,13 +123,22 @@ UART_CONFIG = {
 SYSTEM_CONFIG = {
     'navigation_loop_interval': 0.1,  # 导航循环间隔(秒)
     'avoidance_check_interval': 0.05,  # 避障检查间隔(秒)
+    'motor_command_heartbeat_ticks': 20,  # 导航命令未变化时每隔多少个控制周期重发一次电机命令
+    'control_loop_rt_priority': None,  # 控制事件循环线程的SCHED_FIFO实时优先级(如20)，None表示不提升(需CAP_SYS_NICE)
+    'control_loop_cpu': None,  # 控制事件循环线程绑定的CPU核心(如1)，None表示不绑定
     'status_update_interval': 1.0,  # 状态更新间隔(秒)
+    'mqtt_status_interval': 0.2,  # MQTT状态发布最小间隔(秒)，期间的状态合并为最新一条
+    'mqtt_status_heartbeat': 5.0,  # 状态未变化时的MQTT心跳发布间隔(秒)
+    'mqtt_obstacle_resolution': 50,  # 判断状态变化时障碍物距离的量化精度(毫米)
+    'mqtt_max_command_size': 8192,  # MQTT控制指令最大字节数，超出直接丢弃
+    'mqtt_feedback_flush_interval': 0.02,  # 指令反馈批量发布间隔(秒)
     'log_interval': 10.0,  # 日志记录间隔(秒)
     'max_log_files': 10,  # 最大日志文件数量
     'log_file_size': 10485760,  # 单个日志文件大小(10MB)
     'thread_timeout': 5.0,  # 线程操作超时时间(秒)
     'max_runtime': 7200,  # 最大连续运行时间(秒)
-    'command_queue_size': 100  # 命令队列大小
+    'command_queue_size': 100,  # 命令队列大小
+    'debug_logging': False  # 是否输出模块初始化等调试日志
 }
 
 # 安全配置 - 系统安全参数和限制
@@ -184,6 +198,29 @@ GPIO_CONFIG = {
     'pin_validation': True  # 启用引脚验证
 }
 
+# 导航算法配置的不可变形式 - 字段按属性访问，无需逐层字典查找
+@dataclass(frozen=True, slots=True)
+class CoordValidation:
+    latitude_range: tuple  # 纬度范围
+    longitude_range: tuple  # 经度范围
+    altitude_range: tuple  # 高度范围(米)
+
+@dataclass(frozen=True, slots=True)
+class AlgorithmConfig:
+    target_precision: float  # 目标到达精度(米)
+    max_navigation_distance: float  # 最大导航距离(米)
+    course_correction_threshold: float  # 航向修正阈值(度)
+    speed_reduction_distance: float  # 减速距离(米)
+    waypoint_tolerance: float  # 航点容差(米)
+    max_heading_error: float  # 最大航向误差(度)
+    local_distance_threshold: float  # 等距圆柱近似计算的距离上限(米)
+    coordinate_validation: CoordValidation  # 坐标验证范围
+
+_ALG_FROZEN = None  # 首次调用get_algorithm_config_frozen()时生成，update_config修改算法配置后失效
+
+# 只读配置视图 - 供频繁实例化的模块共享，update_config的修改同样可见
+_NAV_RO = MappingProxyType(NAVIGATION_CONFIG)
+
 # 配置管理函数 - 复用电机驱动模块配置管理模式
 def get_config():
     """获取完整配置字典 - 复用现有配置管理模式"""
@@ -204,6 +241,10 @@ def get_navigation_config():
     """获取导航硬件配置"""
     return NAVIGATION_CONFIG.copy()
 
+def get_navigation_config_readonly():
+    """获取导航硬件配置只读视图(不复制)"""
+    return _NAV_RO
+
 def get_gps_imu_config():
     """获取GPS-IMU配置"""
     return NAVIGATION_CONFIG['GPS_IMU'].copy()
@@ -236,6 +277,23 @@ def get_algorithm_config():
     """获取导航算法配置"""
     return NAVIGATION_ALGORITHM_CONFIG.copy()
 
+def get_algorithm_config_frozen():
+    """获取导航算法配置的不可变实例(不复制)"""
+    global _ALG_FROZEN
+    if _ALG_FROZEN is None:
+        cfg = NAVIGATION_ALGORITHM_CONFIG
+        _ALG_FROZEN = AlgorithmConfig(
+            target_precision=cfg['target_precision'],
+            max_navigation_distance=cfg['max_navigation_distance'],
+            course_correction_threshold=cfg['course_correction_threshold'],
+            speed_reduction_distance=cfg['speed_reduction_distance'],
+            waypoint_tolerance=cfg['waypoint_tolerance'],
+            max_heading_error=cfg['max_heading_error'],
+            local_distance_threshold=cfg['local_distance_threshold'],
+            coordinate_validation=CoordValidation(**cfg['coordinate_validation'])
+        )
+    return _ALG_FROZEN
+
 def get_avoidance_config():
     """获取避障配置"""
     return AVOIDANCE_CONFIG.copy()
@@ -316,6 +374,9 @@ def update_config(section, key, value):
 
     if section in config_map and key in config_map[section]:
         config_map[section][key] = value
+        if section == 'algorithm':
+            global _ALG_FROZEN
+            _ALG_FROZEN = None
         return True
     return False
 
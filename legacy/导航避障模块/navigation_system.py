@@ -7,11 +7,15 @@ import time
 import threading
 import queue
 import asyncio
+import concurrent.futures
+import collections
+import math
+import numpy as np
 import json
 from typing import Dict, Any, Optional, Callable
 from datetime import datetime
 from enum import Enum
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 
 # 导入MQTT客户端
 try:
@@ -21,6 +25,17 @@ except ImportError:
     print("警告: paho-mqtt库未安装，MQTT功能将不可用")
     MQTT_AVAILABLE = False
 
+# 优先使用orjson解析/序列化MQTT消息，未安装时回退到标准库json
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj):
+        return json.dumps(obj).encode()
+
 # 导入子模块
 import sys
 import os
@@ -29,7 +44,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '定位模块'))
 from MAIN import FusionSystem  # GPS-IMU融合定位系统
 from ultrasonic_sensor import UltrasonicSensor  # 超声波避障模块
 from bluetooth_receiver import NavigationBluetoothReceiver  # 蓝牙坐标接收模块
-from pid_controller import NavigationPIDController  # PID导航控制器
+from pid_controller import NavigationPIDController, NavigationResult, Pos  # PID导航控制器
 from config import (get_navigation_config, get_system_config, get_safety_config, 
                    get_state_machine_config, get_avoidance_config)
 
@@ -43,7 +58,7 @@ class NavigationState(Enum):
     ERROR = "错误状态"  # 系统错误
     EMERGENCY_STOP = "紧急停止状态"  # 紧急停止
 
-@dataclass
+@dataclass(slots=True)
 class NavigationStats:
     """导航系统统计信息"""
     start_time: float = 0.0  # 启动时间
@@ -54,12 +69,124 @@ class NavigationStats:
     errors_count: int = 0  # 错误计数
     last_navigation_time: float = 0.0  # 最后导航时间
     total_distance: float = 0.0  # 总航行距离
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典 - 显式列出字段，替代asdict()的fields()反射"""
+        return {
+            'start_time': self.start_time,
+            'uptime': self.uptime,
+            'navigation_commands': self.navigation_commands,
+            'avoidance_events': self.avoidance_events,
+            'targets_reached': self.targets_reached,
+            'errors_count': self.errors_count,
+            'last_navigation_time': self.last_navigation_time,
+            'total_distance': self.total_distance
+        }
+
+# 系统状态中的固定部分 - 模拟的投药/AI检测/硬件状态，启动时编码一次
+_STATUS_STATIC_MODULES = {
+    'medication': {'status': 'idle', 'bay1_level': 80, 'bay2_level': 65},  # 模拟投药状态
+    'ai_detection': {'status': 'running', 'fps': 15}  # 模拟AI检测状态
+}
+_STATUS_HARDWARE = {
+    'battery_level': 85,  # 模拟电池电量
+    'cpu_usage': 45,      # 模拟CPU使用率
+    'memory_usage': 60,   # 模拟内存使用率
+    'temperature': 42     # 模拟温度
+}
+# 拼接在 ..."modules":{sensor, navigation 之后的字节
+_STATUS_STATIC_TAIL = (b',' + _json_dumps(_STATUS_STATIC_MODULES)[1:-1] +
+                       b'},"hardware":' + _json_dumps(_STATUS_HARDWARE) + b'}')
+# 各导航状态中文名称的JSON编码，避免每次发布重复编码
+_STATE_JSON = {state: _json_dumps(state.value) for state in NavigationState}
+_SENSOR_JSON = {
+    True: b'{"status":"running","error":null}',
+    False: b'{"status":"stopped","error":null}'
+}
+
+def _encode_mqtt_status(state: NavigationState, mqtt_status: Dict[str, Any],
+                        target_distance: Optional[float]) -> bytes:
+    """编码系统状态 - 动态标量字段序列化，状态名称及固定部分直接拼接预编码字节"""
+    state_json = _STATE_JSON[state]
+    return b''.join((
+        _json_dumps(mqtt_status)[:-1],
+        b',"navigation_state":', state_json,
+        b',"modules":{"sensor":', _SENSOR_JSON[mqtt_status['running']],
+        b',"navigation":{"status":', state_json,
+        b',"target_distance":', _json_dumps(target_distance), b'}',
+        _STATUS_STATIC_TAIL
+    ))
+
+# 地理距离计算 - 安装numba时JIT编译
+_EARTH_RADIUS = 6378137.0  # 地球半径(米)，与NavigationMath一致
+
+def _haversine(lat1, lon1, lat2, lon2):
+    """两点间Haversine距离(米)，输入为角度"""
+    lat1 = math.radians(lat1)
+    lat2 = math.radians(lat2)
+    dlat = lat2 - lat1
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat * 0.5) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon * 0.5) ** 2
+    return 2.0 * _EARTH_RADIUS * math.asin(math.sqrt(a))
+
+def _ring_path_length(lat, lon, first, last, size):
+    """环形缓冲区中第first到第last个点依次相连的航程(米)"""
+    total = 0.0
+    for k in range(first, last):
+        i = k % size
+        j = (k + 1) % size
+        total += _haversine(lat[i], lon[i], lat[j], lon[j])
+    return total
+
+def _ring_path_length_np(lat, lon, first, last, size):
+    """_ring_path_length的NumPy向量化实现 (未安装numba时使用)"""
+    idx = np.arange(first, last + 1) % size
+    la = np.radians(lat[idx])
+    lo = np.radians(lon[idx])
+    a = np.sin(np.diff(la) * 0.5) ** 2 + np.cos(la[:-1]) * np.cos(la[1:]) * np.sin(np.diff(lo) * 0.5) ** 2
+    return float(np.sum(2.0 * _EARTH_RADIUS * np.arcsin(np.sqrt(a))))
+
+NUMBA_AVAILABLE = None  # Unknown until _ensure_jit() has run
+
+def _ensure_jit():
+    global NUMBA_AVAILABLE, _haversine, _ring_path_length
+    if NUMBA_AVAILABLE is not None:
+        return
+    
+    try:
+        from numba import njit
+    except ImportError:
+        NUMBA_AVAILABLE = False
+        _ring_path_length = _ring_path_length_np
+        return
+    
+    haversine = _haversine
+    
+    # _ring_path_length调用_haversine，须在其后编译
+    _haversine = njit(cache=True, fastmath=True)(_haversine)
+    _ring_path_length = njit(cache=True, fastmath=True)(_ring_path_length)
+    
+    # njit按首次调用延迟编译，在此用一次预热调用完成编译，失败时回退到纯Python/NumPy实现
+    try:
+        _ring_path_length(np.zeros(2), np.zeros(2), 0, 1, 2)
+    except Exception as e:
+        print(f"Numba JIT编译失败，使用NumPy实现: {e}")
+        _haversine = haversine
+        _ring_path_length = _ring_path_length_np
+        NUMBA_AVAILABLE = False
+        return
+    NUMBA_AVAILABLE = True
 
 class NavigationSystem:
     """无人船自主定位导航系统主控制器 - 复用电机驱动模块多线程架构"""
     
+    _TRACK_SIZE = 1024  # 航迹缓冲区容量(点)
+    _TRACK_BATCH = 16  # 航程批量计算的位移段数
+    
     def __init__(self, config_path: str = None):
         """初始化导航系统"""
+        _ensure_jit()
+        
         # 加载配置
         self.nav_config = get_navigation_config()
         self.system_config = get_system_config()
@@ -76,6 +203,7 @@ class NavigationSystem:
         # 系统状态管理 - 复用电机驱动模块状态管理模式
         self.state = NavigationState.IDLE  # 当前系统状态
         self.stats = NavigationStats()  # 系统统计信息
+        self._stats_dict = self.stats.to_dict()  # 统计信息字典形式，随_add_stat/_set_stat同步更新
         self.running = False  # 运行状态标志
         self.emergency_stopped = False  # 紧急停止标志
         
@@ -85,19 +213,32 @@ class NavigationSystem:
         self.current_position = None  # 当前位置
         self.last_position = None  # 上次位置
         
-        # 线程管理 - 复用电机驱动模块多线程架构
-        self.navigation_thread = None  # 导航控制线程
-        self.avoidance_thread = None  # 避障监测线程
+        # 航迹环形缓冲区(SoA) - 每累计_TRACK_BATCH段位移批量计算一次航程
+        self._track_lat = np.empty(self._TRACK_SIZE, dtype=np.float64)
+        self._track_lon = np.empty(self._TRACK_SIZE, dtype=np.float64)
+        self._track_count = 0  # 已写入的定位点总数
+        self._track_accounted = 0  # 航程已累计到的点序号
+        
+        # 任务管理 - 定位/避障/导航三个循环在同一事件循环中以协程运行
+        self._loop = None  # 运行协程的事件循环
+        self._loop_tasks = []  # 定位/避障/导航协程任务
         self.communication_thread = None  # 通信处理线程
-        self.position_thread = None  # 位置更新线程
+        self.mqtt_publisher_thread = None  # MQTT状态发布线程(同时驱动状态客户端网络收发)
+        self._mqtt_publishing = False  # 发布线程运行标志
         
         # 线程安全机制
-        self.state_lock = threading.RLock()  # 状态访问锁
-        self.position_lock = threading.RLock()  # 位置数据锁
-        self.command_queue = queue.Queue(maxsize=self.system_config['command_queue_size'])  # 命令队列
+        self.state_lock = threading.Lock()  # 状态写入锁 - 仅保护组合状态转换，单属性读取不加锁
+        # 命令队列 - SimpleQueue无内部条件变量开销，容量上限由生产方入队前自行检查
+        self.command_queue = queue.SimpleQueue()
+        self.command_queue_size = self.system_config['command_queue_size']
         
         # 任务优先级配置 - 避障 > 导航 > 通信
         self.priority_levels = self.avoidance_config['priority_levels']
+        # 避障状态下允许执行的指令类别 - 优先级不低于避障，紧急停止总是允许
+        avoidance_priority = self.priority_levels['obstacle_avoidance']
+        self._avoidance_allowed = frozenset(
+            [category for category, priority in self.priority_levels.items() if priority <= avoidance_priority]
+            + ['emergency_stop'])
         
         # 最新系统状态 - 线程安全访问
         self._latest_status = {
@@ -107,7 +248,7 @@ class NavigationSystem:
             'target': None,
             'obstacle_distance': None,
             'navigation_command': None,
-            'stats': asdict(self.stats),
+            'stats': self._stats_dict,
             'valid': False
         }
         
@@ -122,6 +263,22 @@ class NavigationSystem:
         self.mqtt_port = 1883  # MQTT broker端口
         self.mqtt_topic = 'system/status'  # 系统状态主题
         self.mqtt_control_topics = ['control/navigation', 'control/medication', 'control/system', 'control/emergency']  # 控制指令主题
+        self._topic_handlers = {  # 控制主题 -> 指令处理方法
+            'control/navigation': self._handle_navigation_command,
+            'control/medication': self._handle_medication_command,
+            'control/system': self._handle_system_command,
+            'control/emergency': self._handle_emergency_command
+        }
+        self.mqtt_status_interval = self.system_config['mqtt_status_interval']  # 状态发布最小间隔(秒)
+        self.mqtt_status_heartbeat = self.system_config['mqtt_status_heartbeat']  # 状态未变化时的心跳间隔(秒)
+        self.mqtt_obstacle_resolution = self.system_config['mqtt_obstacle_resolution']  # 障碍物距离量化精度(毫米)
+        self._last_status_key = None  # 上次发布状态的关键字段
+        self._last_status_ts = 0.0  # 上次发布状态的时间(monotonic)
+        self.mqtt_max_command_size = self.system_config['mqtt_max_command_size']  # 控制指令最大字节数
+        self._status_queue = collections.deque(maxlen=1)  # 只保留最新一条待发布状态
+        self.mqtt_feedback_flush_interval = self.system_config['mqtt_feedback_flush_interval']  # 指令反馈批量发布间隔(秒)
+        self._feedback_queue = collections.deque()  # 待发布的指令反馈 (主题, 负载, QoS)
+        self._status_event = threading.Event()  # 有新状态待发布
         self._init_mqtt_client()
         self._init_mqtt_command_client()
 
@@ -136,7 +293,11 @@ class NavigationSystem:
         try:
             self.mqtt_client = mqtt.Client()
             self.mqtt_client.connect(self.mqtt_broker, self.mqtt_port, 60)
-            self.mqtt_client.loop_start()  # 启动后台线程处理网络流量
+
+            # 状态客户端只发布不订阅，由发布线程直接驱动网络收发和心跳，不再另开loop_start()线程
+            self._mqtt_publishing = True
+            self.mqtt_publisher_thread = threading.Thread(target=self._mqtt_publisher_loop, daemon=True)
+            self.mqtt_publisher_thread.start()
             print(f"导航系统MQTT客户端已连接到 {self.mqtt_broker}:{self.mqtt_port}")
         except Exception as e:
             print(f"导航系统MQTT客户端连接失败: {e}")
@@ -158,12 +319,51 @@ class NavigationSystem:
                 self.mqtt_command_client.subscribe(topic)
                 print(f"已订阅MQTT控制主题: {topic}")
 
-            self.mqtt_command_client.loop_start()  # 启动后台线程处理网络流量
+            # 网络收发由start_system中的事件循环驱动(_attach_mqtt_command_client)，不再另开loop_start()线程
             print(f"导航系统MQTT指令客户端已连接到 {self.mqtt_broker}:{self.mqtt_port}")
         except Exception as e:
             print(f"导航系统MQTT指令客户端连接失败: {e}")
             self.mqtt_enabled = False
 
+    def _attach_mqtt_command_client(self):
+        """将指令客户端socket注册到事件循环 - 可读时loop_read，有待发数据时loop_write"""
+        client = self.mqtt_command_client
+        loop = self._loop
+
+        def on_socket_close(c, userdata, sock):
+            loop.remove_reader(sock)
+            loop.remove_writer(sock)
+
+        client.on_socket_open = lambda c, userdata, sock: loop.add_reader(sock, c.loop_read)
+        client.on_socket_close = on_socket_close
+        client.on_socket_register_write = lambda c, userdata, sock: loop.add_writer(sock, c.loop_write)
+        client.on_socket_unregister_write = lambda c, userdata, sock: loop.remove_writer(sock)
+
+        # 连接已在初始化时建立，补注册当前socket
+        sock = client.socket()
+        if sock is not None:
+            loop.add_reader(sock, client.loop_read)
+            if client.want_write():
+                loop.add_writer(sock, client.loop_write)
+
+    def _detach_mqtt_command_client(self):
+        """清除socket回调，事件循环结束后断开连接时不再访问事件循环"""
+        client = self.mqtt_command_client
+        client.on_socket_open = None
+        client.on_socket_close = None
+        client.on_socket_register_write = None
+        client.on_socket_unregister_write = None
+
+    async def _mqtt_command_misc_loop(self):
+        """MQTT指令客户端维护协程 - 心跳保活与断线重连"""
+        while self.running:
+            if self.mqtt_command_client.loop_misc() != mqtt.MQTT_ERR_SUCCESS:
+                try:
+                    self.mqtt_command_client.reconnect()  # 新socket经on_socket_open重新注册
+                except Exception:
+                    pass
+            await asyncio.sleep(1.0)
+
     def _setup_module_callbacks(self):
         """设置子模块回调函数 - 连接各模块与主控制器"""
         # 设置蓝牙通信回调
@@ -174,6 +374,16 @@ class NavigationSystem:
             position_cb=self._handle_position_query
         )
         
+        # 避障动作 -> 电机控制调用，预先绑定电机API
+        motor_api = self.pid_controller.motor_api
+        move = motor_api['move']
+        self._avoid_dispatch = {
+            'STOP': motor_api['emergency_stop'],
+            'LEFT': lambda: move('LEFT', 'SLOW'),
+            'RIGHT': lambda: move('RIGHT', 'SLOW'),
+            'SLOW': lambda: move('FORWARD', 'SLOW')
+        }
+        
         # 启用PID控制器
         self.pid_controller.enable_control()
         
@@ -183,19 +393,18 @@ class NavigationSystem:
         """处理MQTT控制指令 - 复用蓝牙指令处理架构"""
         try:
             topic = message.topic
-            command_data = json.loads(message.payload.decode())
+            payload = message.payload
+            if len(payload) > self.mqtt_max_command_size:
+                print(f"MQTT控制指令过大已丢弃 - 主题: {topic}, 长度: {len(payload)}")
+                return
+            command_data = _json_loads(payload)  # 直接解析bytes，无需先解码为str
 
             print(f"收到MQTT控制指令 - 主题: {topic}, 数据: {command_data}")
 
             # 根据主题分类处理指令
-            if topic == 'control/navigation':
-                result = self._handle_navigation_command(command_data)
-            elif topic == 'control/medication':
-                result = self._handle_medication_command(command_data)
-            elif topic == 'control/system':
-                result = self._handle_system_command(command_data)
-            elif topic == 'control/emergency':
-                result = self._handle_emergency_command(command_data)
+            handler = self._topic_handlers.get(topic)
+            if handler is not None:
+                result = handler(command_data)
             else:
                 result = {'status': 'error', 'message': f'未知的控制主题: {topic}'}
 
@@ -335,27 +544,8 @@ class NavigationSystem:
             return {'status': 'error', 'message': f'紧急指令处理错误: {e}'}
 
     def _check_command_priority(self, command_category: str) -> bool:
-        """检查指令优先级 - 基于现有优先级配置"""
-        try:
-            from config import AVOIDANCE_CONFIG
-            priority_levels = AVOIDANCE_CONFIG['priority_levels']
-
-            command_priority = priority_levels.get(command_category, 10)
-
-            # 紧急停止：最高优先级，总是允许
-            if command_category == 'emergency_stop':
-                return True
-
-            # 避障状态：只允许紧急停止
-            if self.state == NavigationState.AVOIDING:
-                return command_priority <= priority_levels['obstacle_avoidance']
-
-            # 其他状态：根据优先级判断
-            return True  # 简化实现，实际可根据当前操作优先级判断
-
-        except Exception as e:
-            print(f"优先级检查错误: {e}")
-            return True  # 默认允许执行
+        """检查指令优先级 - 避障状态下只允许预先计算的高优先级指令，其他状态均允许"""
+        return self.state != NavigationState.AVOIDING or command_category in self._avoidance_allowed
 
     def _send_command_feedback(self, topic: str, command_data: Dict[str, Any], result: Dict[str, Any]):
         """发送指令执行反馈"""
@@ -370,20 +560,33 @@ class NavigationSystem:
                 'result': result
             }
 
-            self.mqtt_client.publish(feedback_topic, json.dumps(feedback_data))
-            print(f"指令执行反馈已发送到: {feedback_topic}")
+            # 仅紧急指令反馈要求送达确认(QoS 1)，其余反馈按QoS 0发送
+            qos = 1 if topic.startswith('control/emergency') else 0
+            # 交给发布线程，同一发布间隔内的反馈连续发出
+            self._feedback_queue.append((feedback_topic, _json_dumps(feedback_data), qos))
 
         except Exception as e:
             print(f"指令反馈发送错误: {e}")
 
+    def _add_stat(self, name: str, delta=1):
+        """累加统计字段，同时更新缓存的字典形式"""
+        value = getattr(self.stats, name) + delta
+        setattr(self.stats, name, value)
+        self._stats_dict[name] = value
+
+    def _set_stat(self, name: str, value):
+        """设置统计字段，同时更新缓存的字典形式"""
+        setattr(self.stats, name, value)
+        self._stats_dict[name] = value
+
     def _handle_target_received(self, target_coords: Dict[str, Any]) -> bool:
         """处理接收到的目标坐标"""
         try:
             with self.state_lock:
                 self.target_coordinates = target_coords
                 self.target_set = True
-                print(f"目标坐标已设置: ({target_coords['lat']:.6f}, {target_coords['lng']:.6f})")
-                return True
+            print(f"目标坐标已设置: ({target_coords['lat']:.6f}, {target_coords['lng']:.6f})")
+            return True
         except Exception as e:
             print(f"目标坐标设置错误: {e}")
             return False
@@ -391,9 +594,11 @@ class NavigationSystem:
     def _handle_navigation_start(self, target_coords: Dict[str, Any]) -> bool:
         """处理开始导航命令"""
         try:
-            if self.state == NavigationState.IDLE and self.target_set:
-                with self.state_lock:
+            with self.state_lock:
+                started = self.state == NavigationState.IDLE and self.target_set
+                if started:
                     self.state = NavigationState.NAVIGATING
+            if started:
                 print("导航已启动")
                 return True
             else:
@@ -418,44 +623,46 @@ class NavigationSystem:
             return False
     
     def _handle_position_query(self) -> Dict[str, Any]:
-        """处理位置查询命令"""
-        with self.position_lock:
-            return self.current_position.copy() if self.current_position else {}
+        """处理位置查询命令 - 返回共享的位置快照，调用方不得修改"""
+        return self.current_position or {}
 
     def _handle_emergency_stop(self) -> bool:
         """处理紧急停止命令 - 调用现有emergency_stop方法"""
         return self.emergency_stop()
 
-    def _position_update_loop(self):
-        """位置更新循环线程 - 持续获取GPS-IMU融合定位数据"""
-        print("位置更新线程启动")
+    async def _position_update_loop(self):
+        """位置更新协程 - 持续获取GPS-IMU融合定位数据"""
+        print("位置更新协程启动")
         
         while self.running:
             try:
                 # 获取融合定位数据
                 position_data = self.fusion_system.get_position()
                 
+                # 融合系统每次返回新建的字典，此后不再修改，按引用发布为位置快照
                 if position_data and position_data.get('valid', False):
-                    with self.position_lock:
-                        self.last_position = self.current_position
-                        self.current_position = position_data
-                        
-                        # 计算航行距离
-                        if self.last_position and self.current_position:
-                            distance_delta = self._calculate_distance_delta()
-                            self.stats.total_distance += distance_delta
+                    # 单一写入方: 两次引用赋值各自原子，读取方无需加锁
+                    self.last_position, self.current_position = self.current_position, position_data
+                    
+                    # 记录航迹，攒够一批位移段后计算航行距离
+                    slot = self._track_count % self._TRACK_SIZE
+                    self._track_lat[slot] = position_data['latitude']
+                    self._track_lon[slot] = position_data['longitude']
+                    self._track_count += 1
+                    if self._track_count - 1 - self._track_accounted >= self._TRACK_BATCH:
+                        self._flush_track_distance()
                 
-                time.sleep(0.1)  # 10Hz更新频率
+                await asyncio.sleep(0.1)  # 10Hz更新频率
                 
             except Exception as e:
                 print(f"位置更新错误: {e}")
-                time.sleep(1.0)
+                await asyncio.sleep(1.0)
         
-        print("位置更新线程结束")
+        print("位置更新协程结束")
     
-    def _avoidance_monitor_loop(self):
-        """避障监测循环线程 - 最高优先级任务"""
-        print("避障监测线程启动")
+    async def _avoidance_monitor_loop(self):
+        """避障监测协程 - 最高优先级任务"""
+        print("避障监测协程启动")
         
         while self.running:
             try:
@@ -468,7 +675,7 @@ class NavigationSystem:
                         with self.state_lock:
                             if self.state == NavigationState.NAVIGATING:
                                 self.state = NavigationState.AVOIDING
-                                self.stats.avoidance_events += 1
+                                self._add_stat('avoidance_events')
                                 print(f"检测到障碍物，距离: {obstacle_distance}mm，进入避障模式")
                         
                         # 执行避障动作
@@ -484,45 +691,48 @@ class NavigationSystem:
                             else:
                                 self.state = NavigationState.IDLE
                 
-                time.sleep(self.system_config['avoidance_check_interval'])  # 50ms检查间隔
+                await asyncio.sleep(self.system_config['avoidance_check_interval'])  # 50ms检查间隔
                 
             except Exception as e:
                 print(f"避障监测错误: {e}")
-                time.sleep(0.1)
+                await asyncio.sleep(0.1)
         
-        print("避障监测线程结束")
+        print("避障监测协程结束")
     
-    def _navigation_control_loop(self):
-        """导航控制循环线程 - 执行PID导航控制"""
-        print("导航控制线程启动")
+    async def _navigation_control_loop(self):
+        """导航控制协程 - 执行PID导航控制"""
+        print("导航控制协程启动")
+        nav_result = NavigationResult()  # 每个控制周期复用的结果对象
+        target_dict, target_pos = None, None  # 目标坐标字典及其Pos形式，目标更换时才重新转换
         
         while self.running:
             try:
-                # 只在导航状态下执行导航控制
-                if self.state == NavigationState.NAVIGATING and self.target_set and self.current_position:
+                # 只在导航状态下执行导航控制 (位置与目标各读取一次引用，避免检查后被其他线程替换)
+                current, target = self.current_position, self.target_coordinates
+                if self.state == NavigationState.NAVIGATING and self.target_set and current and target:
                     # 执行PID导航控制
-                    nav_result = self.pid_controller.navigate_to_target(
-                        self.current_position, self.target_coordinates
-                    )
+                    if target is not target_dict:
+                        target_dict, target_pos = target, Pos.from_dict(target)
+                    self.pid_controller.navigate_to_target(Pos.from_dict(current), target_pos, nav_result)
                     
                     # 检查是否到达目标
-                    if nav_result.get('arrived', False):
+                    if nav_result.arrived:
                         with self.state_lock:
                             self.state = NavigationState.ARRIVED
-                            self.stats.targets_reached += 1
-                            print(f"已到达目标位置，距离: {nav_result.get('distance', 0):.2f}米")
+                            self._add_stat('targets_reached')
+                            print(f"已到达目标位置，距离: {nav_result.distance:.2f}米")
                     
-                    self.stats.navigation_commands += 1
-                    self.stats.last_navigation_time = time.time()
+                    self._add_stat('navigation_commands')
+                    self._set_stat('last_navigation_time', time.time())
                 
-                time.sleep(self.system_config['navigation_loop_interval'])  # 100ms控制间隔
+                await asyncio.sleep(self.system_config['navigation_loop_interval'])  # 100ms控制间隔
                 
             except Exception as e:
                 print(f"导航控制错误: {e}")
-                self.stats.errors_count += 1
-                time.sleep(0.5)
+                self._add_stat('errors_count')
+                await asyncio.sleep(0.5)
         
-        print("导航控制线程结束")
+        print("导航控制协程结束")
     
     def _execute_avoidance_action(self, action: str):
         """执行避障动作 - 最高优先级"""
@@ -531,16 +741,9 @@ class NavigationSystem:
             self.pid_controller.disable_control()
             
             # 根据避障动作执行相应操作
-            motor_api = self.pid_controller.motor_api
-            
-            if action == 'STOP':
-                motor_api['emergency_stop']()
-            elif action == 'LEFT':
-                motor_api['move']('LEFT', 'SLOW')
-            elif action == 'RIGHT':
-                motor_api['move']('RIGHT', 'SLOW')
-            elif action == 'SLOW':
-                motor_api['move']('FORWARD', 'SLOW')
+            avoid = self._avoid_dispatch.get(action)
+            if avoid is not None:
+                avoid()
             
             # 重新启用PID控制器
             if self.state == NavigationState.NAVIGATING:
@@ -549,24 +752,52 @@ class NavigationSystem:
         except Exception as e:
             print(f"避障动作执行错误: {e}")
     
-    def _calculate_distance_delta(self) -> float:
-        """计算位置变化距离"""
-        if not self.last_position or not self.current_position:
-            return 0.0
-        
-        try:
-            from pid_controller import NavigationMath
-            nav_math = NavigationMath()
-            return nav_math.haversine_distance(self.last_position, self.current_position)
-        except:
-            return 0.0
+    def _flush_track_distance(self):
+        """将航迹缓冲区中尚未累计的位移段计入总航行距离"""
+        last = self._track_count - 1
+        if last > self._track_accounted:
+            distance = _ring_path_length(self._track_lat, self._track_lon,
+                                         self._track_accounted, last, self._TRACK_SIZE)
+            self._add_stat('total_distance', distance)
+            self._track_accounted = last
     
+    def _apply_control_loop_scheduling(self):
+        """提升控制事件循环线程的调度优先级 - 默认关闭，需在SYSTEM_CONFIG中显式配置
+        
+        避障监测协程运行在此线程，提升后可减少被MQTT发布等线程抢占的唤醒延迟。
+        但同一事件循环还驱动MQTT指令客户端的收发回调和各_handle_*_command指令处理(含大量打印)，
+        它们会获得相同的实时优先级和CPU绑定；此后由本线程创建的线程也会继承该调度策略。
+        """
+        # Linux下pid 0表示调用线程本身
+        priority = self.system_config['control_loop_rt_priority']
+        if priority is not None and hasattr(os, 'sched_setscheduler'):
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+                print(f"控制循环线程已切换为SCHED_FIFO实时调度，优先级: {priority}")
+            except OSError as e:
+                print(f"控制循环实时调度设置失败(需要CAP_SYS_NICE权限): {e}")
+
+        # 绑定到独立CPU核心，与MQTT发布线程分开
+        cpu = self.system_config['control_loop_cpu']
+        if cpu is not None and hasattr(os, 'sched_setaffinity'):
+            try:
+                if cpu in os.sched_getaffinity(0):
+                    os.sched_setaffinity(0, {cpu})
+                    print(f"控制循环线程已绑定到CPU核心: {cpu}")
+            except OSError as e:
+                print(f"控制循环CPU绑定失败: {e}")
+
     async def start_system(self) -> bool:
-        """启动导航系统 - 复用电机驱动模块启动模式"""
+        """启动导航系统 - 复用电机驱动模块启动模式
+        
+        定位/避障/导航循环作为协程任务运行在调用方的事件循环上，start_system返回后
+        调用方必须保持该事件循环运行，否则任务随事件循环结束被取消。
+        一般直接使用 asyncio.run(nav_system.run())，由run()启动系统并运行到stop_system()为止。
+        """
         try:
             print("启动无人船自主定位导航系统...")
             self.state = NavigationState.INITIALIZING
-            self.stats.start_time = time.time()
+            self._set_stat('start_time', time.time())
             
             # 启动子系统
             if not self.fusion_system.start():
@@ -581,16 +812,21 @@ class NavigationSystem:
                 print("蓝牙通信系统启动失败")
                 return False
             
-            # 启动线程
+            # 启动协程任务 (传感器读取均为非阻塞的缓存数据读取)
             self.running = True
             
-            self.position_thread = threading.Thread(target=self._position_update_loop, daemon=True)
-            self.avoidance_thread = threading.Thread(target=self._avoidance_monitor_loop, daemon=True)
-            self.navigation_thread = threading.Thread(target=self._navigation_control_loop, daemon=True)
+            self._loop = asyncio.get_running_loop()
+            self._apply_control_loop_scheduling()
+            self._loop_tasks = [
+                asyncio.create_task(self._position_update_loop()),
+                asyncio.create_task(self._avoidance_monitor_loop()),
+                asyncio.create_task(self._navigation_control_loop())
+            ]
             
-            self.position_thread.start()
-            self.avoidance_thread.start()
-            self.navigation_thread.start()
+            # MQTT指令客户端由本事件循环驱动，控制指令回调也在此线程执行
+            if self.mqtt_command_client:
+                self._attach_mqtt_command_client()
+                self._loop_tasks.append(asyncio.create_task(self._mqtt_command_misc_loop()))
             
             # 等待系统稳定
             await asyncio.sleep(2.0)
@@ -604,6 +840,43 @@ class NavigationSystem:
             self.state = NavigationState.ERROR
             return False
     
+    async def run(self) -> bool:
+        """启动导航系统并运行至stop_system()被调用 - 用法: asyncio.run(nav_system.run())"""
+        if not await self.start_system():
+            return False
+        await asyncio.gather(*self._loop_tasks, return_exceptions=True)
+        return True
+
+    async def _cancel_loop_tasks(self, tasks):
+        """取消协程任务并等待其退出"""
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _stop_loop_tasks(self):
+        """停止协程任务 - 从其他线程调用时等待任务退出(最多5秒)，在事件循环线程内调用时只能取消不能阻塞等待"""
+        tasks, self._loop_tasks = self._loop_tasks, []
+        loop = self._loop
+        if not tasks or loop is None or loop.is_closed() or not loop.is_running():
+            return
+        
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        
+        if running_loop is loop:
+            # 由事件循环内的回调调用 - 任务在本次回调返回后退出，run()中的gather随之结束
+            for task in tasks:
+                task.cancel()
+            return
+        
+        future = asyncio.run_coroutine_threadsafe(self._cancel_loop_tasks(tasks), loop)
+        try:
+            future.result(timeout=5.0)
+        except concurrent.futures.TimeoutError:
+            print("导航系统协程任务未能在5秒内退出")
+
     def stop_system(self) -> bool:
         """停止导航系统 - 优雅关闭"""
         try:
@@ -615,12 +888,10 @@ class NavigationSystem:
             self.ultrasonic.stop_monitoring()
             self.bluetooth.stop_communication()
             self.pid_controller.disable_control()
+            self._flush_track_distance()
             
-            # 等待线程结束
-            threads = [self.position_thread, self.avoidance_thread, self.navigation_thread]
-            for thread in threads:
-                if thread and thread.is_alive():
-                    thread.join(timeout=5.0)
+            # 取消协程任务并等待退出 (可能从事件循环以外的线程调用)
+            self._stop_loop_tasks()
 
             # 清理MQTT客户端
             self._cleanup_mqtt_client()
@@ -638,7 +909,9 @@ class NavigationSystem:
         """清理MQTT客户端资源"""
         if self.mqtt_client:
             try:
-                self.mqtt_client.loop_stop()  # 停止后台线程
+                self._mqtt_publishing = False  # 停止发布线程
+                if self.mqtt_publisher_thread and self.mqtt_publisher_thread.is_alive():
+                    self.mqtt_publisher_thread.join(timeout=5.0)
                 self.mqtt_client.disconnect()  # 断开连接
                 print("导航系统MQTT客户端已断开连接")
             except Exception as e:
@@ -647,12 +920,21 @@ class NavigationSystem:
     def _cleanup_mqtt_command_client(self):
         """清理MQTT指令客户端资源"""
         if self.mqtt_command_client:
-            try:
-                self.mqtt_command_client.loop_stop()  # 停止后台线程
-                self.mqtt_command_client.disconnect()  # 断开连接
-                print("导航系统MQTT指令客户端已断开连接")
-            except Exception as e:
-                print(f"导航系统MQTT指令客户端清理错误: {e}")
+            loop = self._loop
+            if loop is not None and loop.is_running():
+                # socket注册在事件循环上，须在事件循环线程中断开
+                loop.call_soon_threadsafe(self._close_mqtt_command_client)
+            else:
+                self._detach_mqtt_command_client()
+                self._close_mqtt_command_client()
+
+    def _close_mqtt_command_client(self):
+        """断开MQTT指令客户端连接"""
+        try:
+            self.mqtt_command_client.disconnect()  # 断开连接，socket关闭时自动从事件循环注销
+            print("导航系统MQTT指令客户端已断开连接")
+        except Exception as e:
+            print(f"导航系统MQTT指令客户端清理错误: {e}")
     
     def emergency_stop(self) -> bool:
         """全系统紧急停止"""
@@ -676,85 +958,140 @@ class NavigationSystem:
     
     def get_system_status(self) -> Dict[str, Any]:
         """获取系统状态信息"""
-        with self.state_lock, self.position_lock:
-            self.stats.uptime = time.time() - self.stats.start_time if self.stats.start_time > 0 else 0
-
-            status_data = {
-                'timestamp': time.time(),
-                'state': self.state.value,
-                'running': self.running,
-                'target_set': self.target_set,
-                'target_coordinates': self.target_coordinates,
-                'current_position': self.current_position,
-                'obstacle_distance': self.ultrasonic.get_filtered_distance(),
-                'stats': asdict(self.stats),
-                'subsystems': {
-                    'fusion_system': self.fusion_system.get_status(),
-                    'ultrasonic': self.ultrasonic.get_sensor_status(),
-                    'bluetooth': self.bluetooth.get_navigation_status(),
-                    'pid_controller': self.pid_controller.get_controller_status()
-                }
+        # 目标坐标与设置标志成对更新，一次性读取保证一致
+        with self.state_lock:
+            state = self.state
+            target_set = self.target_set
+            target_coordinates = self.target_coordinates
+
+        now = time.time()
+        start_time = self.stats.start_time
+        self._set_stat('uptime', now - start_time if start_time > 0 else 0)
+
+        status_data = {
+            'timestamp': now,
+            'state': state.value,
+            'running': self.running,
+            'target_set': target_set,
+            'target_coordinates': target_coordinates,
+            'current_position': self.current_position,
+            'obstacle_distance': self.ultrasonic.get_filtered_distance(),
+            'stats': self._stats_dict.copy(),
+            'subsystems': {
+                'fusion_system': self.fusion_system.get_status(),
+                'ultrasonic': self.ultrasonic.get_sensor_status(),
+                'bluetooth': self.bluetooth.get_navigation_status(),
+                'pid_controller': self.pid_controller.get_controller_status()
             }
+        }
 
-            # 发送系统状态到MQTT
-            self._send_mqtt_status(status_data)
+        # 发送系统状态到MQTT
+        self._send_mqtt_status(status_data, state)
 
-            return status_data
+        return status_data
 
-    def _send_mqtt_status(self, status_data: Dict[str, Any]):
+    def _send_mqtt_status(self, status_data: Dict[str, Any], state: NavigationState):
         """发送系统状态到MQTT主题"""
         if not self.mqtt_enabled or not self.mqtt_client:
             return
 
         try:
-            # 简化状态数据，只发送关键信息
+            # 简化状态数据，只发送关键信息 (状态名称、modules及hardware在编码时拼接)
             mqtt_status = {
                 'timestamp': status_data['timestamp'],
                 'data_type': 'system_status',
-                'navigation_state': status_data['state'],
                 'running': status_data['running'],
                 'target_set': status_data['target_set'],
-                'obstacle_distance': status_data['obstacle_distance'],
-                'modules': {
-                    'sensor': {'status': 'running' if status_data['running'] else 'stopped', 'error': None},
-                    'navigation': {
-                        'status': status_data['state'],
-                        'target_distance': self._calculate_target_distance() if status_data['target_set'] else None
-                    },
-                    'medication': {'status': 'idle', 'bay1_level': 80, 'bay2_level': 65},  # 模拟投药状态
-                    'ai_detection': {'status': 'running', 'fps': 15}  # 模拟AI检测状态
-                },
-                'hardware': {
-                    'battery_level': 85,  # 模拟电池电量
-                    'cpu_usage': 45,      # 模拟CPU使用率
-                    'memory_usage': 60,   # 模拟内存使用率
-                    'temperature': 42     # 模拟温度
-                }
+                'obstacle_distance': status_data['obstacle_distance']
             }
-
-            # 发送到MQTT主题
-            result = self.mqtt_client.publish(self.mqtt_topic, json.dumps(mqtt_status))
-
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                print(f"系统状态已发送到MQTT主题: {self.mqtt_topic}")
-            else:
-                print(f"系统状态MQTT发送失败，错误码: {result.rc}")
+            target_distance = self._calculate_target_distance() if status_data['target_set'] else None
+
+            # 关键字段未变化且未到心跳间隔时不再发布，障碍物距离和目标距离按精度量化后比较
+            obstacle_distance = status_data['obstacle_distance']
+            status_key = (
+                state, status_data['running'], status_data['target_set'],
+                None if obstacle_distance is None else int(obstacle_distance // self.mqtt_obstacle_resolution),
+                None if target_distance is None else round(target_distance)
+            )
+            now = time.monotonic()
+            if status_key == self._last_status_key and now - self._last_status_ts < self.mqtt_status_heartbeat:
+                return
+            self._last_status_key = status_key
+            self._last_status_ts = now
+
+            # 交给发布线程，未发出的旧状态直接被最新状态覆盖
+            self._status_queue.append((state, mqtt_status, target_distance))
+            self._status_event.set()
 
         except Exception as e:
             print(f"系统状态MQTT发送错误: {e}")
 
+    def _mqtt_publisher_loop(self):
+        """MQTT状态发布线程 - 驱动状态客户端网络收发，合并高频状态查询，按固定间隔只发布最新状态，并批量发布指令反馈"""
+        print("MQTT状态发布线程启动")
+        last_publish = 0.0
+
+        while self._mqtt_publishing:
+            # 处理网络收发和心跳，最长阻塞一个反馈发布间隔
+            if self.mqtt_client.loop(timeout=self.mqtt_feedback_flush_interval) != mqtt.MQTT_ERR_SUCCESS:
+                try:
+                    self.mqtt_client.reconnect()
+                except Exception:
+                    time.sleep(1.0)
+                continue
+
+            if self._feedback_queue:
+                self._flush_command_feedback()
+
+            # 限制发布频率，期间到达的状态只保留最新一条
+            if not self._status_event.is_set():
+                continue
+            now = time.monotonic()
+            if now - last_publish < self.mqtt_status_interval:
+                continue
+            self._status_event.clear()
+            last_publish = now
+
+            try:
+                state, mqtt_status, target_distance = self._status_queue.pop()
+            except IndexError:
+                continue
+
+            try:
+                # 高频遥测状态: QoS 0、不保留，避免PUBACK往返
+                result = self.mqtt_client.publish(self.mqtt_topic, _encode_mqtt_status(state, mqtt_status, target_distance), qos=0, retain=False)
+
+                if result.rc == mqtt.MQTT_ERR_SUCCESS:
+                    print(f"系统状态已发送到MQTT主题: {self.mqtt_topic}")
+                else:
+                    print(f"系统状态MQTT发送失败，错误码: {result.rc}")
+
+            except Exception as e:
+                print(f"系统状态MQTT发送错误: {e}")
+
+        print("MQTT状态发布线程结束")
+
+    def _flush_command_feedback(self):
+        """连续发布所有待发送的指令反馈"""
+        feedback_queue = self._feedback_queue
+        while feedback_queue:
+            feedback_topic, payload, qos = feedback_queue.popleft()
+            try:
+                self.mqtt_client.publish(feedback_topic, payload, qos=qos, retain=False)
+                print(f"指令执行反馈已发送到: {feedback_topic}")
+            except Exception as e:
+                print(f"指令反馈发送错误: {e}")
+
     def _calculate_target_distance(self) -> Optional[float]:
         """计算到目标的距离"""
-        if not self.target_set or not self.current_position or not self.target_coordinates:
+        current, target = self.current_position, self.target_coordinates
+        if not self.target_set or not current or not target:
             return None
 
         try:
-            # 简单的距离计算（实际应用中可能需要更精确的地理距离计算）
-            lat_diff = self.target_coordinates['lat'] - self.current_position['latitude']
-            lng_diff = self.target_coordinates['lng'] - self.current_position['longitude']
-            distance = (lat_diff**2 + lng_diff**2)**0.5 * 111000  # 粗略转换为米
-            return distance
-        except:
+            return _haversine(current['latitude'], current['longitude'],
+                              target['lat'], target['lng'])
+        except Exception:
             return None
 
     def get_navigation_api(self):
@@ -5,8 +5,11 @@
 import time
 import math
 import threading
-from typing import Dict, Any, Optional, Tuple
+import contextlib
+import numpy as np
+from typing import Dict, Any, Optional, Tuple, NamedTuple
 from datetime import datetime
+from enum import IntEnum
 
 # 导入现有模块
 import sys
@@ -18,16 +21,51 @@ from fusion import KalmanFilter  # 复用定位模块的数学计算功能
 from motor_control import get_motor_control_api  # 复用电机控制API
 from config import get_pid_config, get_algorithm_config, get_system_config
 
+# 角度/弧度换算常数及常用数学函数别名 - 控制循环中省去函数调用和math属性查找
+_DEG2RAD = math.pi / 180.0
+_RAD2DEG = 180.0 / math.pi
+_sin, _cos, _asin, _atan2, _sqrt, _hypot = math.sin, math.cos, math.asin, math.atan2, math.sqrt, math.hypot
+
+class Direction(IntEnum):
+    """导航方向命令 - 整数值用于索引电机调用表，name即电机API使用的方向字符串"""
+    STOP = 0
+    FORWARD = 1
+    LEFT = 2
+    RIGHT = 3
+
+class SpeedLevel(IntEnum):
+    """导航速度等级 - name即电机API使用的速度字符串"""
+    STOP = 0
+    SLOW = 1
+    MEDIUM = 2
+    FAST = 3
+
+_SPEED_NAMES = tuple(level.name for level in SpeedLevel)  # 按速度等级索引的速度字符串
+
+class Pos(NamedTuple):
+    """导航位置 - 按属性访问纬度/经度/航向，避免控制循环中的字典查找"""
+    lat: float  # 纬度(度)
+    lng: float  # 经度(度)
+    course: float = 0.0  # 航向(度)
+    
+    @classmethod
+    def from_dict(cls, pos: Dict[str, Any]) -> 'Pos':
+        """由位置字典构造 - 兼容蓝牙坐标(lat/lng)和融合定位(latitude/longitude)两种键名"""
+        if 'lat' in pos:
+            return cls(pos['lat'], pos['lng'], pos.get('course', 0.0))
+        return cls(pos['latitude'], pos['longitude'], pos.get('course', 0.0))
+
 class NavigationMath:
     """导航数学计算工具类 - 复用定位模块的数学功能"""
+    __slots__ = ('EARTH_RADIUS',)
     
     def __init__(self):
         self.EARTH_RADIUS = 6378137.0  # 地球半径(米)
     
-    def haversine_distance(self, pos1: Dict[str, float], pos2: Dict[str, float]) -> float:
+    def haversine_distance(self, pos1: Pos, pos2: Pos) -> float:
         """计算两点间的Haversine距离 - 复用定位模块算法"""
-        lat1, lng1 = math.radians(pos1['lat']), math.radians(pos1['lng'])
-        lat2, lng2 = math.radians(pos2['lat']), math.radians(pos2['lng'])
+        lat1, lng1 = math.radians(pos1.lat), math.radians(pos1.lng)
+        lat2, lng2 = math.radians(pos2.lat), math.radians(pos2.lng)
         
         dlat = lat2 - lat1
         dlng = lng2 - lng1
@@ -37,10 +75,10 @@ class NavigationMath:
         
         return self.EARTH_RADIUS * c  # 距离(米)
     
-    def calculate_bearing(self, pos1: Dict[str, float], pos2: Dict[str, float]) -> float:
+    def calculate_bearing(self, pos1: Pos, pos2: Pos) -> float:
         """计算两点间的方位角 - 复用定位模块算法"""
-        lat1, lng1 = math.radians(pos1['lat']), math.radians(pos1['lng'])
-        lat2, lng2 = math.radians(pos2['lat']), math.radians(pos2['lng'])
+        lat1, lng1 = math.radians(pos1.lat), math.radians(pos1.lng)
+        lat2, lng2 = math.radians(pos2.lat), math.radians(pos2.lng)
         
         dlng = lng2 - lng1
         
@@ -53,23 +91,142 @@ class NavigationMath:
         # 转换为0-360度范围
         return (bearing + 360) % 360
     
+    def distance_and_bearing(self, pos1: Pos, pos2: Pos) -> Tuple[float, float]:
+        """同时计算两点间的Haversine距离和方位角 - 共用三角函数值，供导航控制循环使用"""
+        lat1 = pos1.lat * _DEG2RAD
+        lat2 = pos2.lat * _DEG2RAD
+        dlng = (pos2.lng - pos1.lng) * _DEG2RAD
+        
+        sin_lat1, cos_lat1 = _sin(lat1), _cos(lat1)
+        sin_lat2, cos_lat2 = _sin(lat2), _cos(lat2)
+        # 经度差只取半角正余弦，整角值由倍角公式得到
+        sin_half_dlng, cos_half_dlng = _sin(dlng * 0.5), _cos(dlng * 0.5)
+        sin_half_dlat = _sin((lat2 - lat1) * 0.5)
+        
+        # 距离(米)
+        a = sin_half_dlat * sin_half_dlat + cos_lat1 * cos_lat2 * sin_half_dlng * sin_half_dlng
+        distance = self.EARTH_RADIUS * 2 * _asin(_sqrt(a))
+        
+        # 方位角(0-360度)
+        sin_dlng = 2 * sin_half_dlng * cos_half_dlng
+        cos_dlng = 1 - 2 * sin_half_dlng * sin_half_dlng
+        y = sin_dlng * cos_lat2
+        x = cos_lat1 * sin_lat2 - sin_lat1 * cos_lat2 * cos_dlng
+        bearing = (_atan2(y, x) * _RAD2DEG + 360) % 360
+        
+        return distance, bearing
+    
+    def haversine_distance_local(self, pos1: Pos, pos2: Pos) -> float:
+        """短距离近似距离(米) - 等距圆柱投影，百米内与Haversine的误差远小于GPS定位误差"""
+        dlat = (pos2.lat - pos1.lat) * _DEG2RAD
+        x = (pos2.lng - pos1.lng) * _DEG2RAD * _cos((pos1.lat + pos2.lat) * 0.5 * _DEG2RAD)
+        return self.EARTH_RADIUS * _hypot(dlat, x)
+    
+    def distance_and_bearing_local(self, pos1: Pos, pos2: Pos) -> Tuple[float, float]:
+        """短距离近似距离(米)和方位角(0-360度) - 等距圆柱投影，仅需一次cos"""
+        dlat = (pos2.lat - pos1.lat) * _DEG2RAD
+        x = (pos2.lng - pos1.lng) * _DEG2RAD * _cos((pos1.lat + pos2.lat) * 0.5 * _DEG2RAD)
+        distance = self.EARTH_RADIUS * _hypot(dlat, x)
+        bearing = (_atan2(x, dlat) * _RAD2DEG + 360) % 360
+        return distance, bearing
+    
+    def haversine_batch(self, origin: Pos, targets, dtype=np.float64) -> np.ndarray:
+        """批量计算origin到多个目标点的Haversine距离(米)
+        
+        targets为N×2的(纬度, 经度)数组；米级精度足够时可传dtype=np.float32减半内存带宽
+        """
+        targets = np.asarray(targets, dtype=dtype).reshape(-1, 2)
+        lat1, lng1 = np.radians(np.array((origin.lat, origin.lng), dtype=dtype))
+        lat2 = np.radians(targets[:, 0])
+        lng2 = np.radians(targets[:, 1])
+        
+        a = np.sin((lat2 - lat1) * 0.5) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) * 0.5) ** 2
+        return (2 * self.EARTH_RADIUS) * np.arcsin(np.sqrt(a))
+    
+    def bearing_batch(self, origin: Pos, targets, dtype=np.float64) -> np.ndarray:
+        """批量计算origin到多个目标点的方位角(0-360度)，targets格式同haversine_batch"""
+        targets = np.asarray(targets, dtype=dtype).reshape(-1, 2)
+        lat1, lng1 = np.radians(np.array((origin.lat, origin.lng), dtype=dtype))
+        lat2 = np.radians(targets[:, 0])
+        dlng = np.radians(targets[:, 1]) - lng1
+        
+        cos_lat2 = np.cos(lat2)
+        y = np.sin(dlng) * cos_lat2
+        x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * cos_lat2 * np.cos(dlng)
+        return (np.degrees(np.arctan2(y, x)) + 360) % 360
+    
     def normalize_angle(self, angle: float) -> float:
-        """角度归一化到-180到180度范围"""
-        while angle > 180:
-            angle -= 360
-        while angle < -180:
-            angle += 360
-        return angle
+        """角度归一化到[-180, 180]度范围 - 取模运算，任意大小的输入均为O(1)
+        
+        与逐次加减360的原实现一致: 正向的±180边界保持为180，负向保持为-180
+        """
+        a = (angle + 180.0) % 360.0 - 180.0
+        return 180.0 if a == -180.0 and angle > 0 else a
+
+def _pid_step(kp, ki, kd_over_dt, deadband, error, last_error, integral, dt,
+              ilim_lo, ilim_hi, olim_lo, olim_hi):
+    """PID单步数值计算 - 返回(输出, 积分累积, 死区处理后的误差)，安装numba时JIT编译
+    
+    微分增益以kd/dt传入，固定采样间隔时由调用方预先算好，省去每次的除法
+    """
+    # 死区处理
+    if abs(error) < deadband:
+        error = 0.0
+    
+    # 积分项 (积分限幅)
+    integral = min(max(integral + error * dt, ilim_lo), ilim_hi)
+    
+    # 比例项 + 积分项 + 微分项，输出限幅
+    output = kp * error + ki * integral + kd_over_dt * (error - last_error)
+    output = min(max(output, olim_lo), olim_hi)
+    return output, integral, error
+
+NUMBA_AVAILABLE = None  # Unknown until _ensure_jit() has run
+
+def _ensure_jit():
+    global NUMBA_AVAILABLE, _pid_step
+    if NUMBA_AVAILABLE is not None:
+        return
+    
+    try:
+        from numba import njit
+    except ImportError:
+        NUMBA_AVAILABLE = False
+        return
+    
+    kernel = _pid_step
+    _pid_step = njit(cache=True)(_pid_step)
+    
+    # njit按首次调用延迟编译，在此用一次预热调用完成编译，失败时回退到纯Python实现
+    try:
+        _pid_step(1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.1, -50.0, 50.0, -100.0, 100.0)
+    except Exception as e:
+        print(f"Numba JIT编译失败，使用纯Python实现: {e}")
+        _pid_step = kernel
+        NUMBA_AVAILABLE = False
+        return
+    NUMBA_AVAILABLE = True
 
 class PIDController:
     """PID控制器基类"""
+    __slots__ = ('kp', 'ki', 'kd', 'output_limit', 'integral_limit', 'deadband', 'sample_time',
+                 '_sample_time_ns', '_kd_over_dt', '_dt_tolerance_ns', 'last_error', 'integral', 'last_time',
+                 'update_count', 'last_output', '_snapshot', '_lock')
+    
+    _DT_TOLERANCE = 0.01  # 实际间隔与采样时间的相对偏差在此范围内时按采样时间计算
     
     def __init__(self, kp: float, ki: float, kd: float, 
                  output_limit: Tuple[float, float] = (-100, 100),
                  integral_limit: Tuple[float, float] = (-50, 50),
                  deadband: float = 0.0,
-                 sample_time: float = 0.1):
-        """初始化PID控制器"""
+                 sample_time: float = 0.1,
+                 thread_safe: bool = False):
+        """初始化PID控制器
+        
+        默认只由单一控制线程调用update，不加锁；需要多线程并发更新时传thread_safe=True
+        """
+        _ensure_jit()
+        
         self.kp = kp  # 比例系数
         self.ki = ki  # 积分系数
         self.kd = kd  # 微分系数
@@ -78,83 +235,116 @@ class PIDController:
         self.integral_limit = integral_limit  # 积分限制
         self.deadband = deadband  # 死区范围
         self.sample_time = sample_time  # 采样时间
+        # 固定采样间隔下的预计算量 (修改kd或sample_time后需重新计算)
+        self._sample_time_ns = int(sample_time * 1e9)
+        self._kd_over_dt = kd / sample_time
+        self._dt_tolerance_ns = int(self._sample_time_ns * self._DT_TOLERANCE)
         
         # PID状态变量
         self.last_error = 0.0  # 上次误差
         self.integral = 0.0  # 积分累积
-        self.last_time = 0.0  # 上次更新时间
+        self.last_time = 0  # 上次更新时间 (单调时钟纳秒，0表示尚未更新)
         
         # 统计信息
         self.update_count = 0  # 更新次数
         self.last_output = 0.0  # 上次输出
+        # (上次误差, 积分累积, 上次输出)快照 - 整体替换，状态读取方无需加锁即可得到一致的值
+        self._snapshot = (0.0, 0.0, 0.0)
         
-        self._lock = threading.Lock()  # 线程安全锁
+        self._lock = threading.Lock() if thread_safe else None  # 可选线程安全锁
     
-    def update(self, error: float, current_time: float = None) -> float:
-        """更新PID控制器"""
+    def update(self, error: float, current_time: int = None) -> float:
+        """更新PID控制器
+        
+        current_time为time.monotonic_ns()时间戳，缺省时自动取当前值
+        """
         if current_time is None:
-            current_time = time.time()
+            current_time = time.monotonic_ns()
         
-        with self._lock:
-            # 死区处理
-            if abs(error) < self.deadband:
-                error = 0.0
+        lock = self._lock  # 仅thread_safe=True时存在
+        if lock is not None:
+            lock.acquire()
+        try:
+            # 稳态快速路径 - 误差在死区内且上次误差为零时，比例/微分项为零、积分不变，
+            # 输出只剩积分项，无需进入完整的PID计算
+            if self.last_error == 0.0 and abs(error) < self.deadband:
+                output_limit = self.output_limit
+                output = min(max(self.ki * self.integral, output_limit[0]), output_limit[1])
+                self.last_time = current_time
+                self.last_output = output
+                self._snapshot = (0.0, self.integral, output)
+                self.update_count += 1
+                return output
             
-            # 计算时间间隔
-            if self.last_time == 0.0:
+            # 计算时间间隔 - 接近采样时间时直接使用预计算的微分增益
+            # 单调时钟不会回退，dt <= 0 仅在同一纳秒内重复调用时出现
+            dt_ns = current_time - self.last_time
+            if self.last_time == 0 or dt_ns <= 0 or abs(dt_ns - self._sample_time_ns) <= self._dt_tolerance_ns:
                 dt = self.sample_time
+                kd_over_dt = self._kd_over_dt
             else:
-                dt = current_time - self.last_time
-                if dt <= 0:
-                    dt = self.sample_time
-            
-            # 比例项
-            proportional = self.kp * error
-            
-            # 积分项
-            self.integral += error * dt
-            # 积分限幅
-            self.integral = max(min(self.integral, self.integral_limit[1]), self.integral_limit[0])
-            integral = self.ki * self.integral
+                dt = dt_ns * 1e-9
+                kd_over_dt = self.kd / dt
             
-            # 微分项
-            derivative = self.kd * (error - self.last_error) / dt
-            
-            # PID输出
-            output = proportional + integral + derivative
-            
-            # 输出限幅
-            output = max(min(output, self.output_limit[1]), self.output_limit[0])
+            output, integral, error = _pid_step(
+                self.kp, self.ki, kd_over_dt, self.deadband, error, self.last_error, self.integral, dt,
+                self.integral_limit[0], self.integral_limit[1], self.output_limit[0], self.output_limit[1])
             
             # 更新状态
             self.last_error = error
+            self.integral = integral
             self.last_time = current_time
             self.last_output = output
+            self._snapshot = (error, integral, output)
             self.update_count += 1
             
             return output
+        finally:
+            if lock is not None:
+                lock.release()
     
     def reset(self):
         """重置PID控制器状态"""
-        with self._lock:
+        with self._lock or contextlib.nullcontext():
             self.last_error = 0.0
             self.integral = 0.0
-            self.last_time = 0.0
+            self.last_time = 0
             self.last_output = 0.0
+            self._snapshot = (0.0, 0.0, 0.0)
     
     def get_status(self) -> Dict[str, Any]:
         """获取PID控制器状态"""
-        with self._lock:
-            return {
-                'kp': self.kp, 'ki': self.ki, 'kd': self.kd,
-                'last_error': self.last_error,
-                'integral': self.integral,
-                'last_output': self.last_output,
-                'update_count': self.update_count
-            }
+        last_error, integral, last_output = self._snapshot
+        return {
+            'kp': self.kp, 'ki': self.ki, 'kd': self.kd,
+            'last_error': last_error,
+            'integral': integral,
+            'last_output': last_output,
+            'update_count': self.update_count
+        }
+
+class NavigationResult:
+    """导航控制结果 - 由调用方预分配并在每个控制周期复用"""
+    __slots__ = ('arrived', 'distance', 'heading_cmd')
+    
+    def __init__(self):
+        self.arrived = False  # 是否到达目标
+        self.distance = 0.0  # 距目标距离(米)
+        self.heading_cmd = Direction.STOP  # 下发的方向命令
+
+def _motor_call_ok(result) -> bool:
+    """电机API调用是否成功 - 返回False或status为error的结果字典视为失败"""
+    if result is False:
+        return False
+    return not (isinstance(result, dict) and result.get('status') == 'error')
 
 class NavigationPIDController:
     """导航PID控制器 - 集成航向和速度控制"""
+    __slots__ = ('pid_config', 'algorithm_config', 'system_config', 'nav_math',
+                 'heading_pid', 'speed_pid', 'motor_api',
+                 'target_precision', 'speed_reduction_distance', 'max_heading_error',
+                 'local_distance_threshold', '_direction_table', '_last_cmd', '_heartbeat_ticks',
+                 'enabled', 'last_control_time', 'control_count')
     
     def __init__(self):
         """初始化导航PID控制器"""
@@ -191,11 +381,25 @@ class NavigationPIDController:
         
         # 获取电机控制API
         self.motor_api = get_motor_control_api()
+        # 方向命令 -> 电机调用，按Direction索引，参数为速度等级
+        motor_api = self.motor_api
+        move = motor_api['move']
+        self._direction_table = (
+            lambda speed: motor_api['emergency_stop'](),
+            lambda speed: move('FORWARD', _SPEED_NAMES[speed]),
+            lambda speed: move('LEFT', _SPEED_NAMES[speed]),
+            lambda speed: move('RIGHT', _SPEED_NAMES[speed])
+        )
+        # 命令合并 - 与上次下发相同的(方向, 速度)不重复调用电机API，仅按心跳周期重发
+        self._last_cmd = None  # 上次下发的(方向, 速度)及电机返回值
+        # 心跳周期至少为1 (配置为0或1时每个周期都下发，即关闭合并)
+        self._heartbeat_ticks = max(1, int(self.system_config['motor_command_heartbeat_ticks']))
         
         # 导航参数
         self.target_precision = self.algorithm_config['target_precision']  # 目标精度(米)
         self.speed_reduction_distance = self.algorithm_config['speed_reduction_distance']  # 减速距离(米)
         self.max_heading_error = self.algorithm_config['max_heading_error']  # 最大航向误差(度)
+        self.local_distance_threshold = self.algorithm_config['local_distance_threshold']  # 近似计算距离上限(米)
         
         # 控制状态
         self.enabled = False  # 控制器使能状态
@@ -204,19 +408,27 @@ class NavigationPIDController:
         
         print("导航PID控制器初始化完成")
     
-    def calculate_navigation_command(self, current_pos: Dict[str, float], 
-                                   target_pos: Dict[str, float]) -> Dict[str, Any]:
-        """计算导航控制命令 - 核心导航算法"""
+    def calculate_navigation_command(self, current_pos: Pos, target_pos: Pos) -> Dict[str, Any]:
+        """计算导航控制命令 - 核心导航算法 (兼容旧的位置字典参数)"""
         try:
-            # 计算距离和方位角
-            distance = self.nav_math.haversine_distance(current_pos, target_pos)
-            target_bearing = self.nav_math.calculate_bearing(current_pos, target_pos)
+            if not isinstance(current_pos, Pos):
+                current_pos = Pos.from_dict(current_pos)
+            if not isinstance(target_pos, Pos):
+                target_pos = Pos.from_dict(target_pos)
+            
+            # 计算距离和方位角 - 近距离用等距圆柱近似，超出阈值时改用Haversine
+            distance, target_bearing = self.nav_math.distance_and_bearing_local(current_pos, target_pos)
+            if distance >= self.local_distance_threshold:
+                distance, target_bearing = self.nav_math.distance_and_bearing(current_pos, target_pos)
             
             # 获取当前航向
-            current_heading = current_pos.get('course', 0.0)
+            current_heading = current_pos.course
             
-            # 计算航向误差
-            heading_error = self.nav_math.normalize_angle(target_bearing - current_heading)
+            # 计算航向误差 (内联normalize_angle，归一化到[-180, 180]，正向180保持为180)
+            angle = target_bearing - current_heading
+            heading_error = (angle + 180.0) % 360.0 - 180.0
+            if heading_error == -180.0 and angle > 0:
+                heading_error = 180.0
             
             # 检查是否到达目标
             if distance <= self.target_precision:
@@ -224,8 +436,8 @@ class NavigationPIDController:
                     'arrived': True,
                     'distance': distance,
                     'heading_error': heading_error,
-                    'direction': 'STOP',
-                    'speed': 'STOP'
+                    'direction': Direction.STOP,
+                    'speed': SpeedLevel.STOP
                 }
             
             # 航向PID控制
@@ -254,37 +466,37 @@ class NavigationPIDController:
             print(f"导航命令计算错误: {e}")
             return {
                 'error': str(e),
-                'direction': 'STOP',
-                'speed': 'STOP'
+                'direction': Direction.STOP,
+                'speed': SpeedLevel.STOP
             }
     
-    def _heading_to_direction(self, heading_output: float, heading_error: float) -> str:
+    def _heading_to_direction(self, heading_output: float, heading_error: float) -> Direction:
         """将航向PID输出转换为方向命令"""
         # 检查航向误差是否过大
         if abs(heading_error) > self.max_heading_error:
             # 大角度转向，停止前进
-            return 'LEFT' if heading_error > 0 else 'RIGHT'
+            return Direction.LEFT if heading_error > 0 else Direction.RIGHT
         
         # 根据PID输出确定方向
         if abs(heading_output) < 10:  # 小误差，直行
-            return 'FORWARD'
+            return Direction.FORWARD
         elif heading_output > 0:  # 左转
-            return 'LEFT'
+            return Direction.LEFT
         else:  # 右转
-            return 'RIGHT'
+            return Direction.RIGHT
     
-    def _distance_to_speed(self, speed_output: float, distance: float) -> str:
+    def _distance_to_speed(self, speed_output: float, distance: float) -> SpeedLevel:
         """将速度PID输出转换为速度等级"""
         # 根据距离调整速度
         if distance < self.speed_reduction_distance:
             # 接近目标，减速
-            return 'SLOW'
+            return SpeedLevel.SLOW
         elif speed_output > 60:
-            return 'FAST'
+            return SpeedLevel.FAST
         elif speed_output > 30:
-            return 'MEDIUM'
+            return SpeedLevel.MEDIUM
         else:
-            return 'SLOW'
+            return SpeedLevel.SLOW
     
     def execute_navigation_command(self, nav_command: Dict[str, Any]) -> Dict[str, Any]:
         """执行导航控制命令 - 调用电机控制API"""
@@ -294,21 +506,35 @@ class NavigationPIDController:
             
             direction = nav_command['direction']
             speed = nav_command['speed']
+            # 兼容外部调用方传入的字符串命令
+            if isinstance(direction, str):
+                direction = Direction[direction]
+            if isinstance(speed, str):
+                speed = SpeedLevel[speed]
             
-            # 调用电机控制API
-            if direction == 'STOP' or speed == 'STOP':
-                result = self.motor_api['emergency_stop']()
-            else:
-                result = self.motor_api['move'](direction, speed)
+            # 调用电机控制API - 按方向索引调用表，速度为STOP时同样紧急停止
+            if speed == SpeedLevel.STOP:
+                direction = Direction.STOP
             
+            # 命令未变化且未到心跳周期时跳过电机调用，沿用上次结果；停止命令始终下发
             self.control_count += 1
+            last_cmd = self._last_cmd
+            if (direction != Direction.STOP and last_cmd is not None
+                    and last_cmd[0] == direction and last_cmd[1] == speed
+                    and self.control_count % self._heartbeat_ticks != 0):
+                result = last_cmd[2]
+            else:
+                self._last_cmd = None  # 调用失败或抛出异常时不缓存，下个周期重新下发
+                result = self._direction_table[direction](speed)
+                if _motor_call_ok(result):
+                    self._last_cmd = (direction, speed, result)
             self.last_control_time = time.time()
             
             return {
                 'status': 'success',
                 'motor_result': result,
-                'direction': direction,
-                'speed': speed,
+                'direction': direction.name,
+                'speed': speed.name,
                 'control_count': self.control_count
             }
             
@@ -316,12 +542,23 @@ class NavigationPIDController:
             print(f"导航命令执行错误: {e}")
             return {'status': 'error', 'message': str(e)}
     
-    def navigate_to_target(self, current_pos: Dict[str, float], 
-                          target_pos: Dict[str, float]) -> Dict[str, Any]:
-        """完整的导航控制流程 - 计算并执行导航命令"""
+    def navigate_to_target(self, current_pos: Pos, target_pos: Pos,
+                          out: Optional[NavigationResult] = None):
+        """完整的导航控制流程 - 计算并执行导航命令
+        
+        传入out时结果写入该NavigationResult并返回它，不再构造结果字典
+        """
         # 计算导航命令
         nav_command = self.calculate_navigation_command(current_pos, target_pos)
         
+        if out is not None:
+            if self.enabled:
+                self.execute_navigation_command(nav_command)
+            out.arrived = nav_command.get('arrived', False)
+            out.distance = nav_command.get('distance', 0.0)
+            out.heading_cmd = nav_command['direction']
+            return out
+        
         # 执行导航命令
         if self.enabled:
             execution_result = self.execute_navigation_command(nav_command)
@@ -331,9 +568,22 @@ class NavigationPIDController:
         
         return nav_command
     
+    def nearest_target(self, current_pos: Pos, targets) -> Optional[Tuple[int, float]]:
+        """从候选航点中选出距当前位置最近的一个 - 返回(索引, 距离米)，无候选航点时返回None"""
+        if not isinstance(current_pos, Pos):
+            current_pos = Pos.from_dict(current_pos)
+        
+        distances = self.nav_math.haversine_batch(current_pos, targets)
+        if distances.size == 0:
+            return None
+        
+        index = int(np.argmin(distances))
+        return index, float(distances[index])
+    
     def enable_control(self):
         """使能PID控制器"""
         self.enabled = True
+        self._last_cmd = None  # 禁用期间电机可能被其他模块控制，重新使能后首条命令必须下发
         self.heading_pid.reset()
         self.speed_pid.reset()
         print("导航PID控制器已使能")
@@ -341,6 +591,7 @@ class NavigationPIDController:
     def disable_control(self):
         """禁用PID控制器"""
         self.enabled = False
+        self._last_cmd = None
         # 发送停止命令
         try:
             self.motor_api['emergency_stop']()
@@ -367,6 +618,7 @@ class NavigationPIDController:
             'navigate': self.navigate_to_target,
             'calculate': self.calculate_navigation_command,
             'execute': self.execute_navigation_command,
+            'nearest_target': self.nearest_target,
             'enable': self.enable_control,
             'disable': self.disable_control,
             'get_status': self.get_controller_status,
@@ -382,8 +634,8 @@ def test_pid_controller():
     
     # 测试数学计算
     print("1. 数学计算测试:")
-    pos1 = {'lat': 39.9142, 'lng': 116.4174}
-    pos2 = {'lat': 39.9150, 'lng': 116.4180}
+    pos1 = Pos(39.9142, 116.4174)
+    pos2 = Pos(39.9150, 116.4180)
     
     distance = controller.nav_math.haversine_distance(pos1, pos2)
     bearing = controller.nav_math.calculate_bearing(pos1, pos2)
@@ -391,8 +643,8 @@ def test_pid_controller():
     
     # 测试导航命令计算
     print("\n2. 导航命令计算测试:")
-    current_pos = {'lat': 39.9142, 'lng': 116.4174, 'course': 45.0}
-    target_pos = {'lat': 39.9150, 'lng': 116.4180}
+    current_pos = Pos(39.9142, 116.4174, 45.0)
+    target_pos = Pos(39.9150, 116.4180)
     
     nav_command = controller.calculate_navigation_command(current_pos, target_pos)
     print(f"   导航命令: {nav_command}")
@@ -5,9 +5,39 @@
 import time
 import serial
 import threading
-import statistics
+from bisect import bisect_left
+from collections import deque
 from config import get_navigation_config, get_uart_config, get_avoidance_config, get_system_config
 
+def _median5(a, b, c, d, e):
+    """5个数的中值 - 比较交换网络，6次比较"""
+    if a > b:
+        a, b = b, a
+    if c > d:
+        c, d = d, c
+    if a > c:  # a小于其余3个数，不可能是中值，由e替换
+        a, c, b, d = c, a, d, b
+    a = e
+    if a > b:
+        a, b = b, a
+    if a > c:  # a再次小于其余3个数，中值为剩余数中的最小者
+        a, c, b, d = c, a, d, b
+    return b if b < c else c
+
+def _median(values):
+    """中值 - 与statistics.median一致，偶数个时取中间两数的平均值"""
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[mid]
+    return (ordered[mid - 1] + ordered[mid]) / 2
+
+# 按距离阈值排列的障碍物威胁等级，最后一项对应超出警告距离
+_OBSTACLE_LEVELS = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'SAFE')
+
+# 帧校验失败标记 (与"距离超出范围"的None区分，解析器据此逐字节重新同步)
+_CHECKSUM_ERROR = object()
+
 class UltrasonicSensor:
     """超声波避障传感器驱动类 - 复用传感器模块串口通信架构"""
     
@@ -23,6 +53,7 @@ class UltrasonicSensor:
         self.baudrate = self.config['baudrate']  # 波特率9600
         self.ser = None
         self.connected = False
+        self._rx = bytearray()  # 串口接收缓冲区，按0xFF帧头重新同步
         
         # 传感器数据
         self.distance = 0  # 当前距离值(毫米)
@@ -30,6 +61,7 @@ class UltrasonicSensor:
         self.timestamp = 0  # 数据时间戳
         self.last_distance = 0  # 上次测量距离
         self.measurement_count = 0  # 测量计数
+        self.checksum_error_count = 0  # 帧校验失败计数
         
         # 线程控制 - 复用GPS模块线程安全模式
         self.running = False
@@ -47,9 +79,21 @@ class UltrasonicSensor:
         self.max_attempts = self.avoidance_config['max_avoidance_attempts']
         self.recovery_timeout = self.avoidance_config['recovery_timeout']
         
-        # 数据缓冲区 - 用于滤波处理
-        self.distance_buffer = []
+        # 预先按距离阈值升序排列的避障动作，距离相同时保持配置顺序
+        strategies = sorted(self.avoidance_strategies.values(), key=lambda strategy: strategy['distance'])
+        self._action_dists = tuple(strategy['distance'] for strategy in strategies)
+        self._actions = tuple(strategy['action'] for strategy in strategies) + ('NORMAL',)
+        # 威胁等级阈值: 紧急停止/减速接近/左转避让/警告距离
+        self._level_dists = (
+            self.avoidance_strategies['immediate_stop']['distance'],
+            self.avoidance_strategies['slow_approach']['distance'],
+            self.avoidance_strategies['turn_left']['distance'],
+            self.warning_distance
+        )
+        
+        # 数据缓冲区 - 用于滤波处理，写满后追加新数据自动淘汰最旧数据
         self.buffer_size = 5  # 缓冲区大小
+        self.distance_buffer = deque(maxlen=self.buffer_size)
         
         print(f"超声波传感器初始化完成 - {self.data_format} UART3:{self.port}")
     
@@ -59,7 +103,7 @@ class UltrasonicSensor:
             self.ser = serial.Serial(
                 port=self.port,
                 baudrate=self.baudrate,
-                timeout=self.uart_config['timeout'],
+                timeout=self.config['read_timeout'],  # 监测线程阻塞读取，数据到达即唤醒
                 write_timeout=self.uart_config['write_timeout']
             )
             self.connected = self.ser.isOpen()
@@ -81,6 +125,24 @@ class UltrasonicSensor:
             self.connected = False
             print("超声波传感器已断开连接")
     
+    def _decode_frame(self, data):
+        """解码以0xFF帧头开始的4字节帧 - 返回距离(毫米)；校验失败返回_CHECKSUM_ERROR，距离超出范围返回None"""
+        data_h = data[1]  # 距离数据高8位
+        data_l = data[2]  # 距离数据低8位
+        checksum = data[3]  # 校验和
+        
+        # 校验和验证: SUM = (0xFF + Data_H + Data_L) & 0xFF
+        if (0xFF + data_h + data_l) & 0xFF != checksum:
+            self.checksum_error_count += 1
+            return _CHECKSUM_ERROR
+        
+        # 计算距离值(毫米)并检查范围有效性
+        distance = (data_h << 8) + data_l
+        if self.measurement_range[0] <= distance <= self.measurement_range[1]:
+            return distance
+        print(f"超声波距离超出范围: {distance}mm")
+        return None
+    
     def parse_distance_data(self, data):
         """解析DYP-A02-V2.0 UART自动输出数据格式: 0xFF+Data_H+Data_L+SUM"""
         if not data or len(data) != 4:
@@ -90,27 +152,12 @@ class UltrasonicSensor:
         if data[0] != 0xFF:
             return None
         
-        # 提取距离数据
-        data_h = data[1]  # 距离数据高8位
-        data_l = data[2]  # 距离数据低8位
-        checksum = data[3]  # 校验和
-        
-        # 计算距离值(毫米)
-        distance = (data_h << 8) + data_l
-        
-        # 校验和验证: SUM = (0xFF + Data_H + Data_L) & 0xFF
-        calculated_checksum = (0xFF + data_h + data_l) & 0xFF
-        
-        if calculated_checksum == checksum:
-            # 检查距离范围有效性
-            if self.measurement_range[0] <= distance <= self.measurement_range[1]:
-                return distance
-            else:
-                print(f"超声波距离超出范围: {distance}mm")
-                return None
-        else:
-            print(f"超声波数据校验失败: 计算{calculated_checksum:02X} != 接收{checksum:02X}")
+        distance = self._decode_frame(data)
+        if distance is _CHECKSUM_ERROR:
+            calculated_checksum = (0xFF + data[1] + data[2]) & 0xFF
+            print(f"超声波数据校验失败: 计算{calculated_checksum:02X} != 接收{data[3]:02X}")
             return None
+        return distance
     
     def read_distance(self):
         """读取超声波距离数据 - DYP-A02-V2.0 UART自动输出模式"""
@@ -118,42 +165,65 @@ class UltrasonicSensor:
             return None
         
         try:
-            # DYP-A02-V2.0自动输出模式，每100ms输出一次数据
-            if self.ser.in_waiting >= 4:
-                data = self.ser.read(4)  # 读取4字节数据帧
-                distance = self.parse_distance_data(data)
+            # DYP-A02-V2.0自动输出模式，每100ms输出一次数据；一次读取所有待读字节，
+            # 无数据时阻塞等待一帧(最长read_timeout)
+            rx = self._rx
+            rx += self.ser.read(self.ser.in_waiting or 4)
+            
+            distance = None
+            while len(rx) >= 4:
+                # 丢弃帧头之前的字节
+                start = rx.find(0xFF)
+                if start < 0:
+                    rx.clear()
+                    break
+                if start:
+                    del rx[:start]
+                    if len(rx) < 4:
+                        break
                 
-                if distance is not None:
-                    with self._lock:
-                        self.distance = distance
-                        self.valid = True
-                        self.timestamp = time.time()
-                        self.measurement_count += 1
-                        
-                        # 更新距离缓冲区用于滤波
-                        self.distance_buffer.append(distance)
-                        if len(self.distance_buffer) > self.buffer_size:
-                            self.distance_buffer.pop(0)
-                    
-                    return distance
-                else:
+                # 校验失败则跳过该0xFF继续查找帧头 (可能是数据字节而非帧头)
+                value = self._decode_frame(rx)
+                if value is _CHECKSUM_ERROR:
+                    if self.system_config['debug_logging']:
+                        print(f"超声波数据校验失败，重新同步帧头 (累计{self.checksum_error_count}次)")
+                    del rx[:1]
+                    continue
+                del rx[:4]
+                
+                if value is None:
                     self.valid = False
-                    return None
-            else:
-                return None
+                    continue
+                
+                distance = value
+                with self._lock:
+                    self.distance = distance
+                    self.valid = True
+                    self.timestamp = time.time()
+                    self.measurement_count += 1
+                    
+                    # 更新距离缓冲区用于滤波
+                    self.distance_buffer.append(distance)
+            
+            return distance
                 
         except Exception as e:
             print(f"超声波距离读取错误: {e}")
+            self._rx.clear()
             self.valid = False
+            time.sleep(0.1)  # 串口异常时短暂退避，避免监测线程空转
             return None
     
     def get_filtered_distance(self):
         """获取滤波后的距离数据 - 使用中值滤波减少噪声"""
         with self._lock:
-            if len(self.distance_buffer) >= 3:
+            buffer = self.distance_buffer
+            if len(buffer) == 5:
+                # 缓冲区已满(常态)，使用5点中值网络
+                return _median5(*buffer)
+            elif len(buffer) >= 3:
                 # 使用中值滤波
-                filtered_distance = statistics.median(self.distance_buffer)
-                return filtered_distance
+                return _median(buffer)
             elif self.valid:
                 return self.distance
             else:
@@ -167,12 +237,8 @@ class UltrasonicSensor:
         if distance is None:
             return 'UNKNOWN'  # 无有效距离数据
         
-        # 根据避障策略配置判断动作
-        for strategy_name, strategy in self.avoidance_strategies.items():
-            if distance <= strategy['distance']:
-                return strategy['action']
-        
-        return 'NORMAL'  # 正常状态，无需避障
+        # 根据避障策略配置判断动作 - 取第一个不小于当前距离的阈值，均小于时为正常状态(NORMAL)，无需避障
+        return self._actions[bisect_left(self._action_dists, distance)]
     
     def is_obstacle_detected(self, distance=None):
         """检测是否有障碍物 - 基于安全距离阈值"""
@@ -192,16 +258,8 @@ class UltrasonicSensor:
         if distance is None:
             return 'UNKNOWN'
         
-        if distance <= self.avoidance_strategies['immediate_stop']['distance']:
-            return 'CRITICAL'  # 紧急停止
-        elif distance <= self.avoidance_strategies['slow_approach']['distance']:
-            return 'HIGH'  # 高威胁
-        elif distance <= self.avoidance_strategies['turn_left']['distance']:
-            return 'MEDIUM'  # 中等威胁
-        elif distance <= self.warning_distance:
-            return 'LOW'  # 低威胁
-        else:
-            return 'SAFE'  # 安全
+        # 紧急停止 / 高威胁 / 中等威胁 / 低威胁 / 安全
+        return _OBSTACLE_LEVELS[bisect_left(self._level_dists, distance)]
     
     def start_monitoring(self):
         """启动超声波监测线程 - 复用传感器模块线程模式"""
@@ -229,6 +287,11 @@ class UltrasonicSensor:
         """超声波监测主循环 - 持续读取距离数据"""
         while self.running:
             try:
+                if not self.connected:
+                    time.sleep(0.1)
+                    continue
+                
+                # 阻塞读取，数据到达即返回，超时后重新检查running标志
                 distance = self.read_distance()
                 if distance is not None:
                     action = self.get_avoidance_action(distance)
@@ -238,9 +301,6 @@ class UltrasonicSensor:
                     if level in ['CRITICAL', 'HIGH']:
                         print(f"避障警告: 距离{distance}mm, 威胁等级{level}, 建议动作{action}")
                 
-                # 控制监测频率 - DYP-A02-V2.0自动输出100ms周期
-                time.sleep(0.05)  # 50ms检查间隔，确保及时响应
-                
             except Exception as e:
                 print(f"超声波监测循环错误: {e}")
                 time.sleep(0.1)
@@ -254,6 +314,7 @@ class UltrasonicSensor:
                 'valid': self.valid,
                 'timestamp': self.timestamp,
                 'measurement_count': self.measurement_count,
+                'checksum_errors': self.checksum_error_count,
                 'avoidance_action': self.get_avoidance_action(),
                 'obstacle_level': self.get_obstacle_level(),
                 'safe_distance': self.safe_distance,
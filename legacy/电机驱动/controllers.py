@@ -11,13 +11,32 @@ import config
 def write_sysfs(path, value):
     """Safely writes a value to a sysfs file, handling permissions errors."""
     try:
-        with open(path, 'w') as f:
-            f.write(str(value))
+        # Unbuffered bytes mode: one write() per call, no text encoder layer
+        with open(path, 'wb', buffering=0) as f:
+            f.write(str(value).encode())
         return True
     except (IOError, PermissionError) as e:
         print(f"Error writing to {path}: {e}. Please run the script with 'sudo'.")
         return False
 
+# Helper functions for sysfs attributes kept open across writes
+def open_sysfs(path):
+    """Opens a sysfs attribute for writing and returns its fd, or None on failure."""
+    try:
+        return os.open(path, os.O_WRONLY)
+    except OSError as e:
+        print(f"Error opening {path}: {e}. Please run the script with 'sudo'.")
+        return None
+
+def write_sysfs_fd(fd, value, path):
+    """Writes an integer value to an already opened sysfs attribute (path is only used for error reporting)."""
+    try:
+        os.pwrite(fd, b"%d" % value, 0)
+        return True
+    except OSError as e:
+        print(f"Error writing to {path}: {e}.")
+        return False
+
 class MotorController:
     """
     螺旋桨电机控制器
@@ -38,18 +57,46 @@ class MotorController:
         
         time.sleep(0.5)  # Give sysfs time to create directories
 
-        self._setup_motor(self.motor1_path, "Motor 1")
-        self._setup_motor(self.motor2_path, "Motor 2")
+        # duty_cycle / enable are opened once and kept for the controller's lifetime,
+        # so each speed update is a single write() instead of open/write/close
+        self._duty_fd = {1: None, 2: None}
+        self._enable_fd = {1: None, 2: None}
+        self._last_duty = {1: None, 2: None}  # Last duty_cycle successfully written per motor
+        # Pulse widths for the fixed set of speeds used by movement commands (±each level's throttle, 0),
+        # taken from the per-level tables precomputed in config
+        self._duty_lut = {}
+        for throttle, fwd_ns, rev_ns in zip(config.SPEED_LEVELS, config.FORWARD_PULSE_NS_BY_LEVEL,
+                                            config.REVERSE_PULSE_NS_BY_LEVEL):
+            self._duty_lut[throttle] = fwd_ns
+            self._duty_lut[-throttle] = rev_ns
+        self._setup_motor(1, self.motor1_path, "Motor 1")
+        self._setup_motor(2, self.motor2_path, "Motor 2")
         self.stop_all()
 
-    def _setup_motor(self, motor_path, name):
+    def _setup_motor(self, motor_num, motor_path, name):
         print(f"Configuring {name} at {motor_path}...")
         if not os.path.exists(motor_path):
             print(f"ERROR: PWM path {motor_path} does not exist. Aborting.")
             return
         write_sysfs(os.path.join(motor_path, "period"), config.PERIOD_NS)
-        write_sysfs(os.path.join(motor_path, "duty_cycle"), config.STOP_PULSE_NS)
-        write_sysfs(os.path.join(motor_path, "enable"), 1)
+        self._duty_fd[motor_num] = open_sysfs(os.path.join(motor_path, "duty_cycle"))
+        self._enable_fd[motor_num] = open_sysfs(os.path.join(motor_path, "enable"))
+        self._write_duty(motor_num, config.STOP_PULSE_NS)
+        self._write_attr(motor_num, "enable", 1)
+
+    def _write_attr(self, motor_num, attr, value):
+        """Writes duty_cycle/enable through the cached fd, falling back to a plain sysfs write."""
+        fd = (self._duty_fd if attr == "duty_cycle" else self._enable_fd)[motor_num]
+        path = os.path.join(self.motor1_path if motor_num == 1 else self.motor2_path, attr)
+        if fd is None:
+            return write_sysfs(path, value)
+        return write_sysfs_fd(fd, value, path)
+
+    def _write_duty(self, motor_num, duty_ns):
+        """Writes duty_cycle and remembers it; a failed write clears the cache so the next call retries."""
+        ok = self._write_attr(motor_num, "duty_cycle", duty_ns)
+        self._last_duty[motor_num] = duty_ns if ok else None
+        return ok
 
     def _speed_to_duty_ns(self, speed):
         """Converts normalized speed (-1.0 to 1.0) to nanosecond pulse width."""
@@ -66,25 +113,50 @@ class MotorController:
             print(f"Warning: Speed {speed} is out of range [-1.0, 1.0]. Clamping.")
             speed = max(-1.0, min(1.0, speed))
 
-        duty_ns = self._speed_to_duty_ns(speed)
-        motor_path = self.motor1_path if motor_num == 1 else self.motor2_path
+        duty_ns = self._duty_lut.get(speed)
+        if duty_ns is None:
+            duty_ns = self._speed_to_duty_ns(speed)
+        if self._last_duty[motor_num] == duty_ns:
+            return  # Already running at this pulse width
         
         print(f"Setting Motor {motor_num}: Speed={speed:.2f}, Pulse={duty_ns / 1_000_000:.2f}ms")
-        write_sysfs(os.path.join(motor_path, "duty_cycle"), duty_ns)
+        self._write_duty(motor_num, duty_ns)
+
+    def set_both_speeds(self, speed1, speed2):
+        """Sets both motors back-to-back, with no logging between the two duty_cycle writes."""
+        duty1 = self._duty_lut.get(speed1)
+        if duty1 is None:
+            duty1 = self._speed_to_duty_ns(max(-1.0, min(1.0, speed1)))
+        duty2 = self._duty_lut.get(speed2)
+        if duty2 is None:
+            duty2 = self._speed_to_duty_ns(max(-1.0, min(1.0, speed2)))
+
+        if self._last_duty[1] != duty1:
+            self._write_duty(1, duty1)
+        if self._last_duty[2] != duty2:
+            self._write_duty(2, duty2)
+
+        if config.MOTOR_DEBUG_LOG:
+            print(f"Setting Motors: Pulse1={duty1 / 1_000_000:.2f}ms, Pulse2={duty2 / 1_000_000:.2f}ms")
 
     def stop_all(self):
-        self.set_motor_speed(1, 0)
-        self.set_motor_speed(2, 0)
+        self.set_both_speeds(0, 0)
         print("All motors stopped.")
 
     def cleanup(self):
         print("Cleaning up motor controller...")
-        if os.path.exists(self.motor1_path):
-            write_sysfs(os.path.join(self.motor1_path, "enable"), 0)
-            write_sysfs(os.path.join(config.PWM_CHIP_PATH, "unexport"), config.MOTOR_1_CHANNEL)
-        if os.path.exists(self.motor2_path):
-            write_sysfs(os.path.join(self.motor2_path, "enable"), 0)
-            write_sysfs(os.path.join(config.PWM_CHIP_PATH, "unexport"), config.MOTOR_2_CHANNEL)
+        for motor_num, motor_path, channel in ((1, self.motor1_path, config.MOTOR_1_CHANNEL),
+                                               (2, self.motor2_path, config.MOTOR_2_CHANNEL)):
+            if not os.path.exists(motor_path):
+                continue
+            self._write_attr(motor_num, "enable", 0)
+            self._last_duty[motor_num] = None
+            # Close the cached fds before unexport so the channel directory can be removed
+            for fds in (self._duty_fd, self._enable_fd):
+                if fds[motor_num] is not None:
+                    os.close(fds[motor_num])
+                    fds[motor_num] = None
+            write_sysfs(os.path.join(config.PWM_CHIP_PATH, "unexport"), channel)
         print("Motor controller cleaned up.")
 
 class PumpController:
@@ -38,22 +38,18 @@ class UnmannedBoat:
         print("-------------------------------------")
 
     def handle_movement(self, command):
-        speed_mult = config.SPEED_LEVELS.get(self.current_speed_level, 0.5)
+        throttle = config.SPEED_LEVELS[self.current_speed_level]
         
         # Assuming Motor 1 is Left, Motor 2 is Right.
-        # Differential Steering Logic:
+        # Differential Steering Logic (both motors are updated together; pulse widths come from the controller's lookup table):
         if command == 'w':   # Forward
-            self.motor_controller.set_motor_speed(1, 1.0 * speed_mult)
-            self.motor_controller.set_motor_speed(2, 1.0 * speed_mult)
+            self.motor_controller.set_both_speeds(throttle, throttle)
         elif command == 's': # Backward
-            self.motor_controller.set_motor_speed(1, -1.0 * speed_mult)
-            self.motor_controller.set_motor_speed(2, -1.0 * speed_mult)
+            self.motor_controller.set_both_speeds(-throttle, -throttle)
         elif command == 'a': # Left Turn (Right motor fwd, Left motor bwd)
-            self.motor_controller.set_motor_speed(1, -1.0 * speed_mult)
-            self.motor_controller.set_motor_speed(2, 1.0 * speed_mult)
+            self.motor_controller.set_both_speeds(-throttle, throttle)
         elif command == 'd': # Right Turn (Left motor fwd, Right motor bwd)
-            self.motor_controller.set_motor_speed(1, 1.0 * speed_mult)
-            self.motor_controller.set_motor_speed(2, -1.0 * speed_mult)
+            self.motor_controller.set_both_speeds(throttle, -throttle)
         elif command == 'x': # Stop
             self.motor_controller.stop_all()
 